@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import re
 import sys
-import random
-import csv  
-from collections import defaultdict
+import gc
+import threading
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
 
 LANG_MAX_WORDS = {
     "SP": 24,
@@ -17,39 +23,242 @@ LANG_MAX_WORDS = {
 VALID_LANGS = set(LANG_MAX_WORDS.keys())
 ID_REGEX = re.compile(r'^(SP|EN|PT|DT)(\d{6})$')
 
+class Normalizador:
+    # Normaliza palabras (strip + minúsculas y, si se pide, sin acentos) con una
+    # caché acotada. La forma canónica se interna, así que todas las apariciones
+    # de una palabra (cartones y extracciones) comparten el mismo str y las
+    # comparaciones en sets/dicts se resuelven por identidad. Cada idioma asigna
+    # además un ID entero estable a cada palabra de los cartones, que los motores
+    # numpy y fragmentado usan directamente como columna.
+    def __init__(self, plegar_acentos=False, max_cache=65536):
+        self.plegar_acentos = plegar_acentos
+        self.normalizar = lru_cache(maxsize=max_cache)(self._normalizar)
+        self.ids = defaultdict(dict)
+        self.tokens = defaultdict(list)
+        # Los cartones del servidor se cargan en hilos del executor
+        self._bloqueo = threading.Lock()
+
+    def _normalizar(self, palabra: str) -> str:
+        w = palabra.strip().lower()
+        if self.plegar_acentos:
+            w = "".join(ch for ch in unicodedata.normalize("NFKD", w) if not unicodedata.combining(ch))
+        return sys.intern(w)
+
+    def configurar(self, plegar_acentos: bool):
+        # Cambiar el plegado invalida la caché; debe hacerse antes de cargar cartones
+        self.plegar_acentos = plegar_acentos
+        self.normalizar.cache_clear()
+        self.ids.clear()
+        self.tokens.clear()
+
+    def id_de(self, lang: str, palabra: str) -> int:
+        # ID de la palabra en su idioma, asignándole uno nuevo si no lo tenía (carga)
+        w = self.normalizar(palabra)
+        i = self.ids[lang].get(w)
+        if i is None:
+            with self._bloqueo:
+                tokens = self.tokens[lang]
+                i = self.ids[lang].setdefault(w, len(tokens))
+                if i == len(tokens):
+                    tokens.append(w)
+        return i
+
+    def buscar_id(self, lang: str, palabra: str):
+        # Como id_de pero sin registrar nada (extracciones): None si ningún cartón la tiene
+        return self.ids[lang].get(self.normalizar(palabra))
+
+    def num_ids(self, lang: str) -> int:
+        return len(self.tokens[lang])
+
+
+NORMALIZADOR = Normalizador()
+normalizar = NORMALIZADOR.normalizar
+
+
+def configurar_normalizacion(plegar_acentos: bool):
+    NORMALIZADOR.configurar(plegar_acentos)
+
+
+def validar_carton(id_str: str, words):
+    # Reglas comunes de un cartón: devuelve (id, idioma, palabras) o lanza ValueError
+    id_limpio = id_str.strip()
+    m = ID_REGEX.match(id_limpio)
+    if not m:
+        raise ValueError(f"ID inválido: {id_str}")
+    lang = m.group(1)
+    palabras = {normalizar(w) for w in words if w and not w.isspace()}
+    return validar_normalizadas(id_limpio, lang, palabras)
+
+
+def validar_normalizadas(id_limpio: str, lang: str, palabras):
+    # Reglas de tamaño sobre un set de palabras ya normalizadas
+    if len(palabras) == 0:
+        raise ValueError(f"El cartón {id_limpio} no tiene palabras válidas.")
+    max_allowed = LANG_MAX_WORDS[lang]
+    if len(palabras) > max_allowed:
+        raise ValueError(f"El cartón {id_limpio} tiene {len(palabras)} palabras (máx {max_allowed} para {lang}).")
+    return id_limpio, lang, palabras
+
+
 class Carton:
     def __init__(self, id_str: str, words):
-        self.id = id_str.strip()
-        m = ID_REGEX.match(self.id)
-        if not m:
-            raise ValueError(f"ID inválido: {id_str}")
-        self.lang = m.group(1)
-        cleaned = [w.strip().lower() for w in words if w and w.strip() != ""]
-        self.words = set(cleaned)
-        if len(self.words) == 0:
-            raise ValueError(f"El cartón {self.id} no tiene palabras válidas.")
-        max_allowed = LANG_MAX_WORDS[self.lang]
-        if len(self.words) > max_allowed:
-            raise ValueError(f"El cartón {self.id} tiene {len(self.words)} palabras (máx {max_allowed} para {self.lang}).")
+        self.id, self.lang, self.words = validar_carton(id_str, words)
         self.marked = set()
+        # Palabras que faltan por marcar; el cartón gana cuando llega a 0
+        self.pendientes = len(self.words)
+
+    @classmethod
+    def desde_normalizadas(cls, id_limpio: str, lang: str, palabras):
+        # Constructor para cargas masivas: el ID ya viene validado y las
+        # palabras ya normalizadas, así que se evita repetir ese trabajo
+        c = cls.__new__(cls)
+        c.id, c.lang, c.words = validar_normalizadas(id_limpio, lang, palabras)
+        c.marked = set()
+        c.pendientes = len(c.words)
+        return c
+
+    def mark(self, word: str) -> bool:
+        return self._mark(normalizar(word))
 
-    def mark(self, word: str):
-        w = word.strip().lower()
+    def _mark(self, w: str) -> bool:
+        # Recibe la palabra ya normalizada. Devuelve True solo si esta marca completa el cartón.
         if w in self.words and w not in self.marked:
             self.marked.add(w)
+            self.pendientes -= 1
+            return self.pendientes == 0
+        return False
 
     def is_winner(self) -> bool:
-        return self.words == self.marked
+        return self.pendientes == 0
 
     def remaining(self):
         return self.words - self.marked
 
+    def reiniciar(self):
+        # Deja el cartón sin marcas para reutilizarlo en otra partida
+        self.marked.clear()
+        self.pendientes = len(self.words)
+
     def __repr__(self):
         return f"Carton(id={self.id}, lang={self.lang}, words={len(self.words)})"
 
 
-def cargar_cartones_desde_txt(path):
-    cartones = []
+class RegistroIds:
+    # Registro de IDs ya vistos, compartido por todas las vías de entrada.
+    # La pertenencia usa un mapa de bits: un ID es XX + 6 dígitos, así que hay
+    # como máximo 4 millones de posiciones y el mapa ocupa 500 KB.
+    # Si se indica el origen (archivo y línea) se guarda dónde apareció cada ID
+    # por primera vez para poder reportar los duplicados. Eso no va en un dict
+    # por ID (más de 160 bytes por entrada) sino en dos array('I') por idioma
+    # indexados por la posición en el mapa: la línea y el número de archivo en
+    # `origenes`. Son 8 MB por idioma con origen, tenga 1 o 1 millón de IDs.
+    IDIOMAS = {lang: i for i, lang in enumerate(LANG_MAX_WORDS)}
+    POR_IDIOMA = 1_000_000
+
+    def __init__(self, max_detalles=1000):
+        self.bits = bytearray((len(self.IDIOMAS) * self.POR_IDIOMA + 7) // 8)
+        self.total = 0
+        self.duplicados = 0
+        self.repetidos = Counter()
+        # Archivos de origen; en los arrays se guarda su índice + 1 (0 = sin origen)
+        self.origenes = []
+        self._numero_origen = {}
+        self._lineas = {}
+        self._archivos = {}
+        self.max_detalles = max_detalles
+        self.detalles = []
+
+    def _posicion(self, id_str: str) -> int:
+        return self.IDIOMAS[id_str[:2]] * self.POR_IDIOMA + int(id_str[2:])
+
+    def __contains__(self, id_str: str) -> bool:
+        p = self._posicion(id_str)
+        return bool(self.bits[p >> 3] & (1 << (p & 7)))
+
+    def agregar(self, id_str: str, origen=None, linea=None) -> bool:
+        # Devuelve False (y registra el duplicado) si el ID ya estaba registrado
+        p = self._posicion(id_str)
+        flag = 1 << (p & 7)
+        if self.bits[p >> 3] & flag:
+            self.duplicados += 1
+            self.repetidos[id_str] += 1
+            if len(self.detalles) < self.max_detalles:
+                self.detalles.append((id_str, self._ubicacion(p), (origen, linea)))
+            return False
+        self.bits[p >> 3] |= flag
+        self.total += 1
+        if origen is not None:
+            self._guardar_ubicacion(p, origen, linea)
+        return True
+
+    def _guardar_ubicacion(self, p: int, origen, linea):
+        idioma, i = divmod(p, self.POR_IDIOMA)
+        lineas = self._lineas.get(idioma)
+        if lineas is None:
+            lineas = self._lineas[idioma] = array('I', [0]) * self.POR_IDIOMA
+            self._archivos[idioma] = array('I', [0]) * self.POR_IDIOMA
+        numero = self._numero_origen.get(origen)
+        if numero is None:
+            self.origenes.append(origen)
+            numero = self._numero_origen[origen] = len(self.origenes)
+        # La línea también se guarda + 1 para distinguir "sin línea"
+        lineas[i] = 0 if linea is None else linea + 1
+        self._archivos[idioma][i] = numero
+
+    def _ubicacion(self, p: int):
+        idioma, i = divmod(p, self.POR_IDIOMA)
+        archivos = self._archivos.get(idioma)
+        if archivos is None or not archivos[i]:
+            return None
+        linea = self._lineas[idioma][i]
+        return self.origenes[archivos[i] - 1], (linea - 1 if linea else None)
+
+    def ubicacion(self, id_str: str):
+        # (origen, línea) de la primera aparición del ID, o None si no se indicó
+        return self._ubicacion(self._posicion(id_str))
+
+    @staticmethod
+    def _formatear_ubicacion(ubicacion) -> str:
+        if ubicacion is None or ubicacion[0] is None:
+            return "desconocido"
+        origen, linea = ubicacion
+        return f"{origen}:{linea}" if linea is not None else str(origen)
+
+    def reporte(self, desde=0):
+        # Una línea por duplicado detectado a partir del índice `desde`
+        lineas = []
+        for id_str, primera, repetida in self.detalles[desde:]:
+            lineas.append(f"[INFO] ID duplicado {id_str} en {self._formatear_ubicacion(repetida)} "
+                          f"(ya cargado en {self._formatear_ubicacion(primera)})")
+        return lineas
+
+    def __len__(self):
+        return self.total
+
+
+class ReporteErrores:
+    # Sumidero de errores de carga: imprime cada error (como antes) pero solo
+    # guarda los primeros `max_guardados`, para que un volcado enorme con
+    # muchas líneas malas no acumule memoria.
+    def __init__(self, max_guardados=100, mostrar=True):
+        self.max_guardados = max_guardados
+        self.mostrar = mostrar
+        self.errores = []
+        self.total = 0
+
+    def __call__(self, mensaje: str):
+        self.total += 1
+        if len(self.errores) < self.max_guardados:
+            self.errores.append(mensaje)
+        if self.mostrar:
+            print(mensaje)
+
+
+def iterar_cartones_desde_txt(path, vistos=None, errores=None):
+    # Lee el archivo de forma perezosa y va entregando cartones ya validados.
+    # Si se pasa `vistos` (RegistroIds) se omiten los IDs repetidos.
+    if errores is None:
+        errores = ReporteErrores()
     line_no = 0
     try:
         with open(path, 'r', encoding='utf-8') as f:
@@ -60,22 +269,26 @@ def cargar_cartones_desde_txt(path):
                     continue
                 parts = line.split()
                 if len(parts) < 2:
-                    print(f"[WARN] Línea {line_no}: formato inválido (se requiere ID y >=1 palabra). Línea ignorada.")
+                    errores(f"[WARN] Línea {line_no}: formato inválido (se requiere ID y >=1 palabra). Línea ignorada.")
                     continue
                 id_str = parts[0].strip()
                 palabras = parts[1:]
                 try:
                     c = Carton(id_str, palabras)
-                    cartones.append(c)
                 except ValueError as e:
-                    print(f"[ERROR] Línea {line_no}: {e}. Línea ignorada.")
+                    errores(f"[ERROR] Línea {line_no}: {e}. Línea ignorada.")
+                    continue
+                if vistos is not None and not vistos.agregar(c.id, path, line_no):
+                    continue
+                yield c
     except FileNotFoundError:
-        print(f"[ERROR] No se encontró el archivo TXT: {path}")
-    return cartones
+        errores(f"[ERROR] No se encontró el archivo TXT: {path}")
 
 
-def cargar_cartones_desde_csv(path):
-    cartones = []
+def iterar_cartones_desde_csv(path, vistos=None, errores=None):
+    import csv
+    if errores is None:
+        errores = ReporteErrores()
     line_no = 1
     try:
         with open(path, 'r', encoding='utf-8') as f:
@@ -95,8 +308,8 @@ def cargar_cartones_desde_csv(path):
             col_words = next((x for x in reader.fieldnames if x in ['conjunto de palabras', 'palabras', 'words']), None)
 
             if not col_id or not col_words:
-                print(f"[ERROR] El CSV no tiene las columnas esperadas ('id', 'conjunto de palabras'). Columnas encontradas: {reader.fieldnames}")
-                return []
+                errores(f"[ERROR] El CSV no tiene las columnas esperadas ('id', 'conjunto de palabras'). Columnas encontradas: {reader.fieldnames}")
+                return
 
             for row in reader:
                 line_no += 1
@@ -107,16 +320,255 @@ def cargar_cartones_desde_csv(path):
                 
                 try:
                     c = Carton(id_str, palabras)
-                    cartones.append(c)
                 except ValueError as e:
-                    print(f"[ERROR] CSV línea {line_no}: {e}")
+                    errores(f"[ERROR] CSV línea {line_no}: {e}")
+                    continue
+                if vistos is not None and not vistos.agregar(c.id, path, line_no):
+                    continue
+                yield c
                     
     except FileNotFoundError:
-        print(f"[ERROR] No se encontró el archivo CSV: {path}")
+        errores(f"[ERROR] No se encontró el archivo CSV: {path}")
     except Exception as e:
-        print(f"[ERROR] Fallo al leer CSV: {e}")
-        
-    return cartones
+        errores(f"[ERROR] Fallo al leer CSV: {e}")
+
+
+COLUMNAS_ID = ('id', 'identificador')
+COLUMNAS_PALABRAS = ('conjunto de palabras', 'palabras', 'words', 'frase', 'frases')
+
+
+def _adivinar_delimitador(cabecera):
+    # Con la cabecera basta: el separador es el candidato que más aparece en ella
+    return max((',', ';', '\t', '|'), key=cabecera.count)
+
+
+class _CacheNormalizacion(dict):
+    # dict cuyo __getitem__ (en C) solo llama a normalizar() la primera vez
+    def __missing__(self, palabra):
+        w = self[palabra] = normalizar(palabra)
+        return w
+
+
+@contextmanager
+def gc_pausado():
+    # Cargar cientos de miles de cartones dispara recolecciones completas del
+    # gc que recorren todos los sets ya creados; los cartones no forman ciclos,
+    # así que durante una carga masiva se puede pausar sin riesgo
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if activo:
+            gc.enable()
+
+
+def iterar_cartones_desde_csv_rapido(path, vistos=None, errores=None, delimitador=None,
+                                     tamaño_bloque=10_000, max_frases=4096, tokenizar=None):
+    # Variante de alto rendimiento de iterar_cartones_desde_csv: sin Sniffer ni
+    # DictReader. Las posiciones de las columnas se resuelven una vez con la
+    # cabecera, las filas se leen por bloques con csv.reader (listas, no dicts)
+    # y los textos de palabras repetidos (frases de plantilla) se normalizan una
+    # sola vez. `delimitador` fuerza el separador en vez de deducirlo.
+    # `tokenizar(idioma, texto)` sustituye al split por espacios (ver frases.py).
+    import csv
+    from itertools import islice
+    if errores is None:
+        errores = ReporteErrores()
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            cabecera = f.readline()
+            if delimitador is None:
+                delimitador = _adivinar_delimitador(cabecera)
+            columnas = [x.strip().lower() for x in next(csv.reader([cabecera], delimiter=delimitador), [])]
+            col_id = next((i for i, x in enumerate(columnas) if x in COLUMNAS_ID), None)
+            col_words = next((i for i, x in enumerate(columnas) if x in COLUMNAS_PALABRAS), None)
+            if col_id is None or col_words is None:
+                errores(f"[ERROR] El CSV no tiene las columnas esperadas ('id', 'conjunto de palabras'). Columnas encontradas: {columnas}")
+                return
+
+            necesarias = max(col_id, col_words) + 1
+            campos = itemgetter(col_id, col_words)
+            match_id = ID_REGEX.match
+            cache = _CacheNormalizacion()
+            normalizar_rapido = cache.__getitem__
+            frases = {}
+            desde_normalizadas = Carton.desde_normalizadas
+            reader = csv.reader(f, delimiter=delimitador)
+            while True:
+                bloque = list(islice(reader, tamaño_bloque))
+                if not bloque:
+                    break
+                # line_num cuenta líneas físicas; la cabecera se leyó aparte
+                line_no = reader.line_num + 1 - len(bloque)
+                for fila in bloque:
+                    line_no += 1
+                    if len(fila) < necesarias:
+                        if fila:
+                            errores(f"[ERROR] CSV línea {line_no}: faltan columnas")
+                        continue
+                    id_str, words_str = campos(fila)
+                    id_limpio = id_str.strip()
+                    m = match_id(id_limpio)
+                    if not m:
+                        errores(f"[ERROR] CSV línea {line_no}: ID inválido: {id_str}")
+                        continue
+                    lang = m.group(1)
+                    if tokenizar is not None:
+                        palabras = tokenizar(lang, words_str)
+                    else:
+                        palabras = frases.get(words_str)
+                        if palabras is None:
+                            palabras = frozenset(map(normalizar_rapido, words_str.split()))
+                            if len(frases) < max_frases:
+                                frases[words_str] = palabras
+                    try:
+                        c = desde_normalizadas(id_limpio, lang, set(palabras))
+                    except ValueError as e:
+                        errores(f"[ERROR] CSV línea {line_no}: {e}")
+                        continue
+                    if vistos is not None and not vistos.agregar(c.id, path, line_no):
+                        continue
+                    yield c
+    except FileNotFoundError:
+        errores(f"[ERROR] No se encontró el archivo CSV: {path}")
+    except Exception as e:
+        errores(f"[ERROR] Fallo al leer CSV: {e}")
+
+
+def en_lotes(cartones_iter, tamaño=10_000):
+    # Agrupa un iterador de cartones en listas de como máximo `tamaño` elementos
+    lote = []
+    for c in cartones_iter:
+        lote.append(c)
+        if len(lote) >= tamaño:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def listar_archivos_cartones(patron):
+    # Acepta un directorio (todos sus .txt/.csv) o un patrón glob
+    import glob
+    if os.path.isdir(patron):
+        rutas = [os.path.join(patron, n) for n in os.listdir(patron)]
+    else:
+        rutas = glob.glob(patron)
+    return sorted(r for r in rutas if os.path.isfile(r) and r.lower().endswith(('.txt', '.csv')))
+
+
+def _leer_archivo_importacion(path, delimitador=None, compacto=False):
+    # Parsea y valida un archivo completo (en un proceso del pool o en el
+    # principal). Los duplicados dentro del mismo archivo se resuelven aquí; los
+    # que hay entre archivos se resuelven al unir los resultados.
+    # compacto: devuelve tuplas (id, palabras) en vez de Cartones, que es lo
+    # que viaja de vuelta desde el pool y cuesta bastante menos serializar.
+    errores = ReporteErrores(mostrar=False)
+    locales = RegistroIds()
+    cartones = []
+    lector = iterar_cartones_desde_csv_rapido if path.lower().endswith('.csv') else iterar_cartones_desde_txt
+    argumentos = (delimitador,) if lector is iterar_cartones_desde_csv_rapido else ()
+    with gc_pausado():
+        try:
+            for c in lector(path, locales, errores, *argumentos):
+                cartones.append((c.id, tuple(c.words)) if compacto else c)
+        except Exception as e:
+            # Un archivo ilegible (codificación, permisos...) no tumba la importación:
+            # se conservan los cartones leídos hasta el fallo y se reporta
+            errores(f"[ERROR] Fallo al leer el archivo: {e}")
+    lineas = [locales.ubicacion(c[0] if compacto else c.id)[1] for c in cartones]
+    # detalles está acotado a max_detalles; los conteos van aparte
+    duplicados = (locales.duplicados, locales.repetidos, locales.detalles)
+    return path, cartones, lineas, errores.errores, errores.total, duplicados
+
+
+def importar_masivo(patron, vistos=None, procesos=None, delimitador=None):
+    # Importa en paralelo todos los archivos que coinciden con `patron` usando
+    # las mismas reglas de Carton. Devuelve (cartones, errores) donde errores es
+    # un ReporteErrores con los errores de todos los archivos y los duplicados.
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    if vistos is None:
+        vistos = RegistroIds()
+    errores = ReporteErrores(mostrar=False)
+    rutas = listar_archivos_cartones(patron)
+    if not rutas:
+        errores(f"[ERROR] No se encontraron archivos .txt/.csv en: {patron}")
+        return [], errores
+
+    # Con un solo archivo o una sola CPU el pool solo añade arranque y serialización
+    if procesos == 1 or len(rutas) == 1 or (procesos is None and (os.cpu_count() or 1) == 1):
+        resultados = map(partial(_leer_archivo_importacion, delimitador=delimitador), rutas)
+        pool = None
+    else:
+        # Con 'spawn' (Windows, macOS) los procesos importan Bingo_P de nuevo y
+        # no heredan la configuración del normalizador (BINGO_SIN_ACENTOS)
+        pool = ProcessPoolExecutor(max_workers=procesos, initializer=configurar_normalizacion,
+                                   initargs=(NORMALIZADOR.plegar_acentos,))
+        resultados = pool.map(partial(_leer_archivo_importacion, delimitador=delimitador, compacto=True), rutas)
+
+    cartones = []
+    desde_normalizadas = Carton.desde_normalizadas
+    try:
+        # map conserva el orden de las rutas, así el resultado es determinista
+        for path, nuevos, lineas, mensajes, total, (duplicados, repetidos, detalles) in resultados:
+            for mensaje in mensajes:
+                errores(f"{path}: {mensaje}")
+            # Los errores que el proceso no guardó solo se cuentan
+            errores.total += total - len(mensajes)
+            vistos.duplicados += duplicados
+            vistos.repetidos.update(repetidos)
+            vistos.detalles.extend(detalles[:max(0, vistos.max_detalles - len(vistos.detalles))])
+            for c, linea in zip(nuevos, lineas):
+                if pool is not None:
+                    # Ya validado en el proceso del pool; solo se reconstruye
+                    id_str, palabras = c
+                    if not vistos.agregar(id_str, path, linea):
+                        continue
+                    c = desde_normalizadas(id_str, id_str[:2], set(palabras))
+                elif not vistos.agregar(c.id, path, linea):
+                    continue
+                cartones.append(c)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return cartones, errores
+
+
+def iterar_cartones_desde_archivo(path, vistos=None, errores=None):
+    # Elige el lector por la extensión: .csv (lectura rápida), .bngp o texto
+    if path.lower().endswith('.csv'):
+        return iterar_cartones_desde_csv_rapido(path, vistos, errores)
+    if path.lower().endswith('.bngp'):
+        return _iterar_cartones_desde_bngp(path, vistos, errores)
+    return iterar_cartones_desde_txt(path, vistos, errores)
+
+
+def _iterar_cartones_desde_bngp(path, vistos=None, errores=None):
+    from archivo_binario import ArchivoCartones
+    if errores is None:
+        errores = ReporteErrores()
+    try:
+        with ArchivoCartones(path) as archivo:
+            for pos, c in enumerate(archivo, 1):
+                if vistos is None or vistos.agregar(c.id, path, pos):
+                    yield c
+    except (OSError, ValueError) as e:
+        errores(f"[ERROR] No se pudo leer el archivo binario {path}: {e}")
+
+
+def cargar_cartones_desde_txt(path):
+    return list(iterar_cartones_desde_txt(path))
+
+
+def cargar_cartones_desde_csv(path):
+    return list(iterar_cartones_desde_csv(path))
+
+
+def cargar_cartones_desde_csv_rapido(path, delimitador=None):
+    with gc_pausado():
+        return list(iterar_cartones_desde_csv_rapido(path, delimitador=delimitador))
 
 
 def ingreso_manual_carton():
@@ -134,48 +586,301 @@ def ingreso_manual_carton():
 
 
 def agrupar_por_id(cartones):
-    ids = [c.id for c in cartones]
-    dupes = set([x for x in ids if ids.count(x) > 1])
-    if dupes:
-        raise ValueError(f"IDs duplicados detectados: {', '.join(sorted(dupes))}")
-    return {c.id: c for c in cartones}
+    # Una sola pasada sobre los cartones (antes era O(n²) con ids.count)
+    registro = RegistroIds(max_detalles=0)
+    por_id = {}
+    for c in cartones:
+        if registro.agregar(c.id):
+            por_id[c.id] = c
+    if registro.duplicados:
+        detalle = ', '.join(f"{x} (x{n + 1})" for x, n in sorted(registro.repetidos.items()))
+        raise ValueError(f"IDs duplicados detectados: {detalle}")
+    return por_id
 
-def greedy_mark_and_check(word: str, cartones_lista):
+def construir_indice(cartones_lista):
+    # Índice invertido palabra -> cartones que la contienen, en el mismo orden que la lista
+    indice = defaultdict(list)
+    for c in cartones_lista:
+        for w in c.words:
+            indice[w].append(c)
+    return dict(indice)
+
+
+def greedy_mark_and_check(word: str, cartones_lista, indice=None):
     if not word:
         return []
-    w = word.strip().lower()
-    winners = []
-    for c in cartones_lista:
-        if w in c.words and w not in c.marked:
-            c.marked.add(w)
-    for c in cartones_lista:
-        if c.is_winner():
-            winners.append(c)
-    return winners
+    w = normalizar(word)
+    # Solo se tocan los cartones que contienen la palabra (si hay índice)
+    candidatos = indice.get(w, []) if indice is not None else cartones_lista
+    # Se devuelven únicamente los cartones que se completaron con esta palabra
+    return [c for c in candidatos if c._mark(w)]
 
 
-def jugar(cartones):
+class RondaIndice:
+    # Motor por defecto: marca sobre los propios Carton usando el índice invertido.
+    # Además mantiene los cartones agrupados en cubetas según las palabras que les
+    # faltan, actualizadas en cada marca, para responder al instante qué cartones
+    # están más cerca de ganar.
+    def __init__(self, cartones_lista):
+        self.cartones = cartones_lista
+        self.indice = construir_indice(cartones_lista)
+        self._armar_cubetas()
+
+    def _armar_cubetas(self):
+        # cubetas[k] = cartones a los que les faltan k palabras (dict como conjunto ordenado)
+        maximo = max((len(c.words) for c in self.cartones), default=0)
+        self.cubetas = [{} for _ in range(maximo + 1)]
+        for c in self.cartones:
+            self.cubetas[c.pendientes][c] = None
+
+    def marcar(self, palabra: str):
+        # Igual que greedy_mark_and_check con índice, moviendo de cubeta
+        # solo los cartones que reciben una marca nueva
+        w = normalizar(palabra)
+        cubetas = self.cubetas
+        ganadores = []
+        for c in self.indice.get(w, []):
+            antes = c.pendientes
+            if c._mark(w):
+                ganadores.append(c)
+            if c.pendientes != antes:
+                del cubetas[antes][c]
+                cubetas[c.pendientes][c] = None
+        return ganadores
+
+    def beneficiados(self, palabra: str) -> int:
+        # Todos los cartones que contienen la palabra quedan marcados con ella
+        return len(self.indice.get(normalizar(palabra), []))
+
+    def ganadores(self):
+        return [c for c in self.cartones if c.is_winner()]
+
+    def faltan(self, carton) -> int:
+        return carton.pendientes
+
+    def mas_cercanos(self, k=10):
+        # Los k cartones con menos palabras pendientes: (carton, faltan)
+        res = []
+        for faltan, cubeta in enumerate(self.cubetas):
+            for c in cubeta:
+                if len(res) >= k:
+                    return res
+                res.append((c, faltan))
+        return res
+
+    def distribucion(self):
+        # Cuántos cartones hay con 0, 1, 2... palabras pendientes
+        return {faltan: len(cubeta) for faltan, cubeta in enumerate(self.cubetas) if cubeta}
+
+    def reiniciar(self):
+        for c in self.cartones:
+            c.reiniciar()
+        self._armar_cubetas()
+
+
+def filas_mas_cercanas(pendientes, k=10):
+    # Para motores que guardan las palabras pendientes en un buffer de un byte
+    # por cartón (MotorBits, MotorFragmentado): filas de los k cartones con
+    # menos pendientes, por nivel y en orden de carga dentro de cada nivel.
+    # Sin cubetas como las de RondaIndice el coste es O(n), pero cada nivel se
+    # busca con bytes.find (memchr en C) en vez de recorrer los cartones en Python.
+    datos = bytes(pendientes)
+    filas = []
+    for nivel in range(max(LANG_MAX_WORDS.values()) + 1):
+        byte = bytes((nivel,))
+        i = datos.find(byte)
+        while i != -1 and len(filas) < k:
+            filas.append(i)
+            i = datos.find(byte, i + 1)
+        if len(filas) >= k:
+            break
+    return filas
+
+
+def _motor_numpy(cartones_lista):
+    # numpy es opcional: solo se importa si se elige este motor
+    from motor_numpy import MotorNumpy
+    return MotorNumpy(cartones_lista)
+
+
+def _motor_bits(cartones_lista):
+    from cartones_compactos import MotorBits
+    return MotorBits(cartones_lista)
+
+
+def _motor_fragmentado(cartones_lista):
+    from motor_fragmentado import MotorFragmentado
+    return MotorFragmentado(cartones_lista)
+
+
+# Motores de ronda intercambiables. Todos reciben una lista de Carton y ofrecen
+# marcar, beneficiados, ganadores, faltan, mas_cercanos, distribucion y reiniciar.
+MOTORES = {
+    "indice": RondaIndice,
+    "bits": _motor_bits,
+    "numpy": _motor_numpy,
+    "fragmentado": _motor_fragmentado,
+}
+
+
+def _motor_numpy_seccion(seccion):
+    from motor_numpy import MotorNumpy
+    if not hasattr(seccion, "normalizadas"):
+        # Un AlmacenBits no tiene la tabla de índices por fila del .bngp
+        return MotorNumpy(list(seccion))
+    return MotorNumpy.desde_seccion(seccion)
+
+
+def _motor_bits_seccion(seccion):
+    from cartones_compactos import AlmacenBits, MotorBits
+    if not isinstance(seccion, AlmacenBits):
+        seccion = AlmacenBits.desde_seccion(seccion)
+    return MotorBits.desde_almacen(seccion)
+
+
+# Motores que se construyen directamente sobre una sección de un archivo .bngp
+# (archivo_binario.SeccionIdioma) o de un AlmacenCompacto sin crear un Carton por fila
+MOTORES_SECCION = {
+    "numpy": _motor_numpy_seccion,
+    "bits": _motor_bits_seccion,
+}
+
+
+def preparar_rondas(cartones, motor="indice"):
+    # idioma -> motor de ronda. `cartones` es una lista de Carton, un
+    # ArchivoCartones abierto o un AlmacenCompacto; en esos dos casos, si el
+    # motor está en MOTORES_SECCION, los Carton solo se crean para devolver ganadores.
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES)})")
+    secciones = getattr(cartones, "secciones", None)
+    if secciones is not None:
+        construir = MOTORES_SECCION.get(motor)
+        return {lang: construir(seccion) if construir else MOTORES[motor](list(seccion))
+                for lang, seccion in secciones.items() if len(seccion)}
     lang_to_cartones = defaultdict(list)
     for c in cartones:
         lang_to_cartones[c.lang].append(c)
+    return {lang: MOTORES[motor](lista) for lang, lista in lang_to_cartones.items()}
+
+
+def aplicar_extracciones(ronda, palabras):
+    # Aplica en bloque una secuencia de palabras extraídas sobre una ronda
+    # (cualquier motor de MOTORES), sin imprimir nada. Se detiene en la primera
+    # extracción que produce ganadores y devuelve (nº de extracción, ganadores),
+    # contando desde 1; si nadie gana devuelve (None, []).
+    marcar = ronda.marcar
+    for n, palabra in enumerate(palabras, 1):
+        ganadores = marcar(palabra)
+        if ganadores:
+            return n, ganadores
+    return None, []
+
+
+def fichas_extracciones(archivo):
+    # Genera las palabras de un archivo abierto (o sys.stdin), una o varias por
+    # línea; cada 'END' (también a mitad de línea) cierra la ronda y se genera como None
+    for linea in archivo:
+        for palabra in linea.split():
+            yield None if palabra.upper() == 'END' else palabra
+
+
+def leer_extracciones(fichas):
+    # Palabras de una ronda: consume un iterador de fichas_extracciones() hasta
+    # el siguiente 'END', de modo que lo que sigue en la línea queda para la próxima
+    for palabra in fichas:
+        if palabra is None:
+            return
+        yield palabra
+
+
+def orden_de_rondas(semilla):
+    # Orden de rondas por idioma que corresponde a una semilla
+    import random
+    idiomas = list(LANG_MAX_WORDS.keys())
+    random.Random(semilla).shuffle(idiomas)
+    return idiomas
 
-    idiomas = list(LANG_MAX_WORDS.keys())  
-    random.shuffle(idiomas)
-    print("\nOrden aleatorio de rondas por idioma:")
+
+def mostrar_paginado(consulta, formato, tamaño=20, **filtros):
+    # Imprime el resultado de una ConsultaCartones (consultas.py) página a página
+    mostrados = 0
+    for n, pagina in enumerate(consulta.paginas(tamaño, **filtros), 1):
+        for c in pagina:
+            print(formato(c))
+        mostrados += len(pagina)
+        if len(pagina) < tamaño:
+            break
+        if input(f"-- Página {n}. Enter para ver más, 'q' para volver: ").strip().lower() == 'q':
+            break
+    if not mostrados:
+        print("Ningún cartón cumple el filtro.")
+
+
+def jugar(cartones, motor="indice", diario=None, reanudar=None, grabacion=None, semilla=None):
+    # diario: Diario (diario.py) donde se registra cada evento para poder recuperar la partida.
+    # reanudar: EstadoPartida recuperado; se reaplican sus extracciones y se sigue desde su ronda.
+    # grabacion: Grabacion (grabacion.py) con semilla, orden y extracciones para repetir la partida.
+    # semilla: fija el orden de rondas; si no se da se elige una al azar y queda grabada.
+    # cartones puede ser también un ArchivoCartones abierto (ver preparar_rondas).
+    rondas = preparar_rondas(cartones, motor)
+    # Destinos de los eventos de la partida (diario y/o grabación)
+    registros = [r for r in (diario, grabacion) if r is not None]
+
+    if reanudar is not None:
+        idiomas = list(reanudar.orden)
+        print("\nPartida reanudada. Orden de rondas por idioma:")
+        if diario is not None:
+            diario.continuar(reanudar)
+        if grabacion is not None:
+            grabacion.iniciar(cartones, idiomas, previas=reanudar.extracciones)
+        # Se reaplican en el orden de las rondas; la última palabra registrada
+        # pudo completar cartones sin que llegara a anunciarse (la palabra se
+        # registra antes de marcarla)
+        for lang in idiomas:
+            if lang not in rondas:
+                continue
+            n, ganadores = aplicar_extracciones(rondas[lang], reanudar.extracciones.get(lang, []))
+            if ganadores:
+                print(" -> ".join(idiomas))
+                print(f"\n=== GANADORES DETECTADOS (ronda {lang}, extracción {n}) ===")
+                for g in ganadores:
+                    print(g.id)
+                print("El juego finaliza inmediatamente por aparición de ganador(es).")
+                for r in registros:
+                    r.fin(ganadores)
+                return
+    else:
+        if semilla is None:
+            import random
+            semilla = random.randrange(2 ** 32)
+        idiomas = orden_de_rondas(semilla)
+        print("\nOrden aleatorio de rondas por idioma:")
+        if diario is not None:
+            diario.iniciar(cartones, idiomas)
+        if grabacion is not None:
+            grabacion.iniciar(cartones, idiomas, semilla)
     print(" -> ".join(idiomas))
     print("\nINSTRUCCIONES:")
     print(" - Para terminar la ronda actual y pasar a la siguiente escribe 'END'.")
     print(" - Para detener todo el juego escribe 'STOP'.")
+    print(" - Para ver los cartones más cerca de ganar escribe ':top' (o ':top 20'); con ':' delante")
+    print("   no se confunde con una palabra extraída.")
     print(" - Las comparaciones son case-insensitive.")
     print()
 
     for idioma in idiomas:
+        if reanudar is not None and idioma in reanudar.completadas:
+            continue
         print(f"\n--- RONDA: {idioma} ---")
-        total_cartones = len(lang_to_cartones.get(idioma, []))
+        total_cartones = len(rondas[idioma].cartones) if idioma in rondas else 0
         print(f"Cartones en esta ronda: {total_cartones}")
         if total_cartones == 0:
             print("No hay cartones de este idioma. Se omite la ronda.")
             continue
+        if diario is not None and diario.estado.actual != idioma:
+            diario.ronda(idioma)
+        if grabacion is not None:
+            grabacion.ronda(idioma)
 
         while True:
             entrada = input("Palabra extraída (o 'END' para finalizar ronda, 'STOP' para terminar juego): ").strip()
@@ -184,44 +889,85 @@ def jugar(cartones):
             cmd = entrada.strip()
             if cmd.upper() == 'END':
                 # Revisión final de ronda
-                ganadores = [c for c in lang_to_cartones[idioma] if c.is_winner()]
+                ganadores = rondas[idioma].ganadores()
                 if ganadores:
                     print("\n=== GANADORES EN ESTA RONDA (evaluación END) ===")
                     for g in ganadores:
                         print(g.id)
                     print("El juego finaliza porque hubo uno o más cartones ganadores.")
+                    for r in registros:
+                        r.fin(ganadores)
                     return
                 else:
                     print("No hubo cartones ganadores en esta ronda.")
+                for r in registros:
+                    r.fin_ronda(idioma)
                 break
             if cmd.upper() == 'STOP':
                 print("Juego detenido por el usuario.")
+                for r in registros:
+                    r.fin()
                 return
+            partes = cmd.split()
+            if partes[0].lower() == ':top' and len(partes) <= 2 and (len(partes) == 1 or partes[1].isdigit()):
+                k = int(partes[1]) if len(partes) == 2 else 10
+                print(f"Cartones más cerca de ganar ({idioma}):")
+                for c, faltan in rondas[idioma].mas_cercanos(k):
+                    print(f" - {c.id}: faltan {faltan} palabras")
+                continue
 
             palabra = cmd.strip()
-            ganadores = greedy_mark_and_check(palabra, lang_to_cartones[idioma])
+            # Se registra antes de marcar: si el proceso muere, la palabra no se pierde
+            for r in registros:
+                r.palabra(idioma, palabra)
+            ganadores = rondas[idioma].marcar(palabra)
 
             if ganadores:
                 print("\n=== GANADORES DETECTADOS ===")
                 for g in ganadores:
                     print(g.id)
                 print("El juego finaliza inmediatamente por aparición de ganador(es).")
+                for r in registros:
+                    r.fin(ganadores)
                 return
             else:
-                beneficiados = sum(1 for c in lang_to_cartones[idioma] if palabra.strip().lower() in c.marked)
+                beneficiados = rondas[idioma].beneficiados(palabra)
                 print(f"Palabra procesada. Cartones que la marcaron: {beneficiados}")
 
     print("\nSe completaron todas las rondas programadas. No se detectaron ganadores.")
+    for r in registros:
+        r.fin()
     mostrar_estado_final = input("¿Deseas ver el estado final de los cartones? (s/n): ").strip().lower()
     if mostrar_estado_final.startswith('s'):
-        for c in cartones:
-            rem = c.remaining()
-            print(f"{c.id} ({c.lang}) - faltan {len(rem)} palabras")
+        from consultas import ConsultaCartones, leer_filtros
+        if isinstance(cartones, ConsultaCartones):
+            consulta = cartones
+        else:
+            # Los cartones de los propios motores: al reanudar desde un .bngp,
+            # iterar el archivo crearía Cartons nuevos sin las marcas de la ronda
+            consulta = ConsultaCartones(c for r in rondas.values() for c in r.cartones)
+        consulta.vincular(rondas)
+        try:
+            for lang, n in consulta.conteo_por_idioma().items():
+                niveles = ", ".join(f"{faltan}: {k}" for faltan, k in consulta.distribucion(lang).items())
+                print(f"{lang}: {n} cartones (palabras pendientes -> cartones: {niveles})")
+            filtros = leer_filtros(input("Filtrar por idioma, prefijo de ID y/o máximo de palabras pendientes (Enter para todos): "))
+            mostrar_paginado(consulta, lambda c: f"{c.id} ({c.lang}) - faltan {consulta.faltan(c)} palabras", **filtros)
+        finally:
+            consulta.vincular(None)
 
 
 def main():
     print("Bingo_P - Gestor de partidas (Versión CSV + TXT)")
-    cartones = []
+    if os.environ.get("BINGO_SIN_ACENTOS"):
+        # "canción" y "cancion" cuentan como la misma palabra
+        configurar_normalizacion(plegar_acentos=True)
+    import instrumentacion
+    instrumentado = instrumentacion.activar_desde_entorno(sys.modules[__name__])
+    from consultas import ConsultaCartones, leer_filtros
+    # Lista de cartones con conteos por idioma que se actualizan al cargar
+    cartones = ConsultaCartones()
+    vistos = RegistroIds()
     while True:
         print("\nOpciones de entrada:")
         print(" 1) Cargar cartones desde archivo .TXT")
@@ -229,35 +975,38 @@ def main():
         print(" 3) Ingresar cartón manualmente")
         print(" 4) Listar cartones cargados")
         print(" 5) Comenzar juego")
-        print(" 6) Salir")
-        opcion = input("Elige una opción (1-6): ").strip()
+        print(" 6) Importación masiva (directorio o patrón de archivos)")
+        print(" 7) Exportar cartones a archivo binario (.bngp)")
+        print(" 8) Abrir archivo binario (.bngp)")
+        print(" 9) Reanudar partida interrumpida (diario de recuperación)")
+        print("10) Salir")
+        opcion = input("Elige una opción (1-10): ").strip()
         
-        if opcion == '1':
-            path = input("Ruta al archivo .TXT: ").strip()
-            nuevos = cargar_cartones_desde_txt(path)
-            if nuevos:
-                existing_ids = {c.id for c in cartones}
-                uniques = [c for c in nuevos if c.id not in existing_ids]
-                if len(uniques) < len(nuevos):
-                    print(f"[INFO] Se omitieron {len(nuevos)-len(uniques)} cartones duplicados.")
-                cartones.extend(uniques)
-                print(f"{len(uniques)} cartones añadidos.")
-
-        elif opcion == '2':
-            path = input("Ruta al archivo .CSV: ").strip()
-            nuevos = cargar_cartones_desde_csv(path)
-            if nuevos:
-                existing_ids = {c.id for c in cartones}
-                uniques = [c for c in nuevos if c.id not in existing_ids]
-                if len(uniques) < len(nuevos):
-                    print(f"[INFO] Se omitieron {len(nuevos)-len(uniques)} cartones duplicados.")
-                cartones.extend(uniques)
-                print(f"{len(uniques)} cartones añadidos.")
+        if opcion in ('1', '2'):
+            if opcion == '1':
+                path = input("Ruta al archivo .TXT: ").strip()
+                iterador = iterar_cartones_desde_txt(path, vistos)
+            elif os.environ.get("BINGO_FRASES"):
+                # Cartones-frase: se tokeniza cada oración y se quitan las palabras vacías
+                from frases import iterar_cartones_desde_frases
+                path = input("Ruta al archivo .CSV de frases: ").strip()
+                iterador = iterar_cartones_desde_frases(path, vistos)
+            else:
+                path = input("Ruta al archivo .CSV: ").strip()
+                iterador = iterar_cartones_desde_csv(path, vistos)
+            antes, duplicados, detalles = len(cartones), vistos.duplicados, len(vistos.detalles)
+            cartones.extend(iterador)
+            if vistos.duplicados > duplicados:
+                for linea in vistos.reporte(detalles):
+                    print(linea)
+                print(f"[INFO] Se omitieron {vistos.duplicados - duplicados} cartones duplicados.")
+            if len(cartones) > antes or vistos.duplicados > duplicados:
+                print(f"{len(cartones) - antes} cartones añadidos.")
 
         elif opcion == '3':
             c = ingreso_manual_carton()
             if c:
-                if any(existing.id == c.id for existing in cartones):
+                if not vistos.agregar(c.id, "manual"):
                     print(f"[ERROR] Ya existe un cartón con ID {c.id}. No se añadió.")
                 else:
                     cartones.append(c)
@@ -268,27 +1017,308 @@ def main():
                 print("No hay cartones cargados.")
             else:
                 print(f"Cartones cargados ({len(cartones)}):")
-                mostrar = cartones if len(cartones) < 20 else cartones[:10] + cartones[-10:]
-                for c in mostrar:
-                    print(f" - {c.id} ({c.lang}) palabras: {len(c.words)}")
-                if len(cartones) >= 20:
-                    print(f"   ... (y {len(cartones)-20} más)")
+                for lang, n in cartones.conteo_por_idioma().items():
+                    print(f"   {lang}: {n}")
+                filtros = leer_filtros(input("Filtrar por idioma y/o prefijo de ID (Enter para todos): "))
+                mostrar_paginado(cartones, lambda c: f" - {c.id} ({c.lang}) palabras: {len(c.words)}", **filtros)
 
         elif opcion == '5':
             if not cartones:
                 print("No hay cartones cargados. Carga al menos uno antes de comenzar.")
                 continue
+            base = input("Ruta base del diario de recuperación (Enter para omitir): ").strip()
             try:
                 agrupar_por_id(cartones)
-                jugar(cartones)
-            except ValueError as e:
+                # El motor de marcado se elige al arrancar: BINGO_MOTOR=indice|bits|numpy
+                motor = os.environ.get("BINGO_MOTOR", "indice")
+                diario = grabacion = None
+                if base:
+                    from diario import Diario
+                    diario = Diario(base)
+                # BINGO_GRABAR=directorio graba la partida; BINGO_SEMILLA fija el orden de rondas
+                if os.environ.get("BINGO_GRABAR"):
+                    from grabacion import Grabacion, ruta_nueva
+                    grabacion = Grabacion(ruta_nueva(os.environ["BINGO_GRABAR"]))
+                    print(f"Grabando la partida en {grabacion.ruta}")
+                semilla = os.environ.get("BINGO_SEMILLA")
+                jugar(cartones, motor, diario=diario, grabacion=grabacion,
+                      semilla=int(semilla) if semilla else None)
+            except (ValueError, OSError) as e:
                 print(f"[ERROR] {e}")
 
         elif opcion == '6':
+            patron = input("Directorio o patrón (ej: exportes/*.csv): ").strip()
+            antes, detalles = len(cartones), len(vistos.detalles)
+            nuevos, errores = importar_masivo(patron, vistos)
+            cartones.extend(nuevos)
+            for mensaje in errores.errores:
+                print(mensaje)
+            if errores.total > len(errores.errores):
+                print(f"   ... (y {errores.total - len(errores.errores)} errores más)")
+            for linea in vistos.reporte(detalles):
+                print(linea)
+            print(f"{len(cartones) - antes} cartones añadidos.")
+
+        elif opcion == '7':
+            if not cartones:
+                print("No hay cartones cargados.")
+                continue
+            from archivo_binario import exportar_archivo
+            path = input("Ruta del archivo .bngp a crear: ").strip()
+            try:
+                exportar_archivo(cartones, path)
+                print(f"{len(cartones)} cartones exportados a {path}.")
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] {e}")
+
+        elif opcion == '8':
+            path = input("Ruta al archivo .bngp: ").strip()
+            antes, duplicados = len(cartones), vistos.duplicados
+            with gc_pausado():
+                cartones.extend(_iterar_cartones_desde_bngp(path, vistos))
+            if vistos.duplicados > duplicados:
+                print(f"[INFO] Se omitieron {vistos.duplicados - duplicados} cartones duplicados.")
+            print(f"{len(cartones) - antes} cartones añadidos.")
+
+        elif opcion == '9':
+            from diario import Diario, recuperar
+            base = input("Ruta base del diario de recuperación: ").strip()
+            try:
+                estado = recuperar(base)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[ERROR] No se pudo recuperar la partida: {e}")
+                continue
+            if estado.terminada:
+                estado.cartones.cerrar()
+                print("Esa partida ya había terminado.")
+                continue
+            # Se juega sobre el .bngp de la partida; los cartones pasan al menú después
+            archivo = estado.cartones
+            print(f"{len(archivo)} cartones recuperados.")
+            with archivo:
+                jugar(archivo, os.environ.get("BINGO_MOTOR", "indice"), diario=Diario(base), reanudar=estado)
+                with gc_pausado():
+                    cartones = ConsultaCartones(archivo)
+            vistos = RegistroIds()
+            for c in cartones:
+                vistos.agregar(c.id, base)
+
+        elif opcion == '10':
+            if instrumentado:
+                instrumentacion.imprimir_volcado()
             print("Saliendo.")
             sys.exit(0)
         else:
             print("Opción inválida.")
 
+def _cli_cargar(args):
+    # Carga común de los subcomandos: todos los archivos, sin IDs repetidos
+    vistos = RegistroIds()
+    errores = ReporteErrores(mostrar=not args.silencioso)
+    cartones = []
+    with gc_pausado():
+        for path in args.archivos:
+            if args.frases and path.lower().endswith('.csv'):
+                from frases import iterar_cartones_desde_frases
+                cartones.extend(iterar_cartones_desde_frases(path, vistos, errores))
+            else:
+                cartones.extend(iterar_cartones_desde_archivo(path, vistos, errores))
+    if not args.silencioso:
+        for linea in vistos.reporte():
+            print(linea)
+    return cartones, vistos, errores
+
+
+def _cli_validar(args):
+    cartones, vistos, errores = _cli_cargar(args)
+    print(f"{len(cartones)} cartones válidos, {errores.total} errores, {vistos.duplicados} duplicados.")
+    return 1 if errores.total or vistos.duplicados else 0
+
+
+def _cli_exportar(args):
+    from archivo_binario import exportar_archivo
+    cartones, vistos, errores = _cli_cargar(args)
+    try:
+        exportar_archivo(cartones, args.salida)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"{len(cartones)} cartones guardados en {args.salida} "
+          f"({errores.total} errores, {vistos.duplicados} duplicados omitidos).")
+    return 0
+
+
+def _cli_jugar(args):
+    # Igual que jugar() pero leyendo las extracciones de un archivo: una o
+    # varias palabras por línea y 'END' para pasar a la siguiente ronda
+    if len(args.archivos) == 1 and args.archivos[0].lower().endswith('.bngp'):
+        # Un único .bngp se juega sobre el mmap sin cargarlo entero (ver preparar_rondas)
+        from archivo_binario import ArchivoCartones
+        try:
+            archivo = ArchivoCartones(args.archivos[0])
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] No se pudo leer el archivo binario {args.archivos[0]}: {e}")
+            return 1
+        with archivo:
+            return _cli_partida(args, archivo)
+    if args.compacto:
+        if args.grabar:
+            # El almacén agrupa por idioma y la huella de la grabación depende del orden de carga
+            print("[ERROR] --grabar no se puede combinar con --compacto.")
+            return 1
+        return _cli_partida(args, _cli_cargar_compacto(args))
+    cartones, _, _ = _cli_cargar(args)
+    return _cli_partida(args, cartones)
+
+
+def _cli_cargar_compacto(args):
+    # Como _cli_cargar, pero cada cartón se guarda como máscara de bits en un
+    # AlmacenCompacto (cartones_compactos.py) en vez de como Carton
+    from cartones_compactos import AlmacenCompacto
+    vistos = RegistroIds()
+    errores = ReporteErrores(mostrar=not args.silencioso)
+    almacen = AlmacenCompacto()
+    with gc_pausado():
+        for path in args.archivos:
+            if args.frases and path.lower().endswith('.csv'):
+                from frases import iterar_cartones_desde_frases
+                almacen.extend(iterar_cartones_desde_frases(path, vistos, errores))
+            else:
+                almacen.cargar(path, vistos, errores)
+    if not args.silencioso:
+        for linea in vistos.reporte():
+            print(linea)
+    return almacen
+
+
+def _cli_partida(args, cartones):
+    from contextlib import nullcontext
+    if not len(cartones):
+        print("No hay cartones cargados.")
+        return 1
+    # Se abre antes de preparar nada para no dejar un .bngr a medias si falta el archivo
+    try:
+        entrada = nullcontext(sys.stdin) if args.extracciones == '-' else open(args.extracciones, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"[ERROR] No se pudo abrir el archivo de extracciones: {e}")
+        return 1
+    motor = args.motor or ("bits" if args.compacto else os.environ.get("BINGO_MOTOR", "indice"))
+    rondas = preparar_rondas(cartones, motor)
+    semilla = args.semilla
+    if semilla is None:
+        import random
+        semilla = random.randrange(2 ** 32)
+    idiomas = orden_de_rondas(semilla)
+    print(f"Orden de rondas (semilla {semilla}): {' -> '.join(idiomas)}")
+    grabacion = None
+    if args.grabar:
+        from grabacion import Grabacion
+        grabacion = Grabacion(args.grabar)
+        try:
+            grabacion.iniciar(cartones, idiomas, semilla)
+        except OSError as e:
+            print(f"[ERROR] No se pudo crear la grabación: {e}")
+            return 1
+
+    with entrada as f:
+        fichas = fichas_extracciones(f)
+        for idioma in idiomas:
+            if idioma not in rondas:
+                continue
+            if grabacion is not None:
+                grabacion.ronda(idioma)
+            for n, palabra in enumerate(leer_extracciones(fichas), 1):
+                if grabacion is not None:
+                    grabacion.palabra(idioma, palabra)
+                ganadores = rondas[idioma].marcar(palabra)
+                if ganadores:
+                    print(f"Ganadores en la ronda {idioma}, extracción {n}:")
+                    for g in ganadores:
+                        print(g.id)
+                    if grabacion is not None:
+                        grabacion.fin(ganadores)
+                    return 0
+            print(f"Ronda {idioma} sin ganadores.")
+            if grabacion is not None:
+                grabacion.fin_ronda(idioma)
+    print("No se detectaron ganadores.")
+    if grabacion is not None:
+        grabacion.fin()
+    return 0
+
+
+def _cli_estadisticas(args):
+    from consultas import ConsultaCartones
+    cartones, vistos, errores = _cli_cargar(args)
+    consulta = ConsultaCartones(cartones)
+    print(f"Total de cartones: {len(consulta)}")
+    for lang, n in consulta.conteo_por_idioma().items():
+        lista = consulta.por_idioma[lang]
+        vocabulario = len({w for c in lista for w in c.words})
+        tamaños = dict(sorted(Counter(len(c.words) for c in lista).items()))
+        print(f"  {lang}: {n} cartones, vocabulario de {vocabulario} palabras, palabras por cartón {tamaños}")
+    print(f"Errores: {errores.total}. Duplicados omitidos: {vistos.duplicados}.")
+    return 0
+
+
+def _cli_simular(args):
+    from simulacion import simular
+    cartones, _, _ = _cli_cargar(args)
+    if not cartones:
+        print("No hay cartones cargados.")
+        return 1
+    print(simular(cartones, args.partidas, args.semilla, args.procesos, args.extracciones).resumen())
+    return 0
+
+
+def cli(argv=None):
+    # Uso sin menú, pensado para scripts y planificadores:
+    #   python Bingo_P.py validar cartones.txt
+    #   python Bingo_P.py jugar cartones.txt -e sorteo.txt --semilla 7
+    # Cada subcomando importa solo los módulos que necesita.
+    import argparse
+    parser = argparse.ArgumentParser(prog="Bingo_P.py",
+                                     description="Bingo_P sin menú interactivo (sin argumentos se abre el menú)")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    def subcomando(nombre, alias, ayuda, funcion):
+        p = subcomandos.add_parser(nombre, aliases=[alias], help=ayuda)
+        p.add_argument("archivos", nargs="+", help="archivos .txt, .csv o .bngp de cartones")
+        p.add_argument("--frases", action="store_true", help="los .csv contienen frases completas (ver frases.py)")
+        p.add_argument("-q", "--silencioso", action="store_true", help="solo muestra el resumen")
+        p.set_defaults(funcion=funcion)
+        return p
+
+    subcomando("validar", "validate", "valida archivos de cartones (código 1 si hay errores o duplicados)",
+               _cli_validar)
+    p = subcomando("cargar", "load", "valida los cartones y los guarda en un archivo .bngp", _cli_exportar)
+    p.add_argument("-o", "--salida", required=True, help="archivo .bngp a crear")
+    p = subcomando("jugar", "play-from-file", "juega una partida con las extracciones de un archivo", _cli_jugar)
+    p.add_argument("-e", "--extracciones", required=True,
+                   help="palabras extraídas, con 'END' entre rondas ('-' lee de la entrada estándar)")
+    p.add_argument("--semilla", type=int, help="fija el orden de rondas (como BINGO_SEMILLA)")
+    p.add_argument("--motor", choices=list(MOTORES),
+                   help="motor de marcado (por defecto BINGO_MOTOR, o 'bits' con --compacto)")
+    p.add_argument("--compacto", action="store_true",
+                   help="guarda los cartones como máscaras de bits (AlmacenCompacto) en vez de objetos Carton")
+    p.add_argument("--grabar", help="guarda la partida en este archivo .bngr (ver grabacion.py)")
+    subcomando("estadisticas", "stats", "cartones por idioma, vocabulario y tamaños", _cli_estadisticas)
+    p = subcomando("simular", "simulate", "simulación Monte Carlo de partidas (ver simulacion.py)", _cli_simular)
+    p.add_argument("-n", "--partidas", type=int, default=1000)
+    p.add_argument("--semilla", type=int, default=None)
+    p.add_argument("--procesos", type=int, default=1)
+    p.add_argument("--extracciones", type=int, default=None,
+                   help="máximo de palabras por ronda antes de pasar a la siguiente (END)")
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
 if __name__ == '__main__':
-    main()
+    # Se trabaja sobre el módulo importado y no sobre __main__: los demás
+    # módulos hacen `from Bingo_P import ...` y así comparten el mismo
+    # normalizador (BINGO_SIN_ACENTOS) y las mismas clases
+    import Bingo_P
+    if len(sys.argv) > 1:
+        sys.exit(Bingo_P.cli(sys.argv[1:]))
+    Bingo_P.main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Archivo binario de cartones (.bngp) para no volver a parsear TXT/CSV en cada
+# arranque. Se abre con mmap, así que abrirlo cuesta lo mismo con 100 cartones
+# que con millones: los cartones se materializan solo cuando se piden.
+#
+# Formato (little-endian, secciones alineadas a 8 bytes):
+#   cabecera:  b"BNGP" | versión u16 | nº de idiomas u16
+#   por idioma (en el orden de LANG_MAX_WORDS):
+#              idioma 2s | máx palabras u16 | nº cartones u32 | nº palabras vocab u32
+#              offset vocabulario u64 | offset ids u64 | offset totales u64 | offset palabras u64
+#   vocabulario: por palabra, longitud u16 + bytes utf-8
+#   ids:       u32 por cartón (parte numérica; el prefijo es el idioma de la sección)
+#   totales:   u8 por cartón (nº de palabras)
+#   palabras:  máx_palabras × u16 por cartón, índices al vocabulario, relleno 0xFFFF
+
+import mmap
+import struct
+from array import array
+
+from Bingo_P import LANG_MAX_WORDS, Carton, normalizar
+
+MAGIA = b"BNGP"
+VERSION = 1
+CABECERA = struct.Struct("<4sHH")
+SECCION = struct.Struct("<2sHII4Q")
+VACIO = 0xFFFF
+
+
+def _alinear(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def exportar_archivo(cartones, path):
+    # Escribe los cartones (cualquier iterable de Carton) en formato .bngp
+    por_idioma = {lang: [] for lang in LANG_MAX_WORDS}
+    for c in cartones:
+        por_idioma[c.lang].append(c)
+
+    bloques = []
+    for lang, lista in por_idioma.items():
+        maximo = LANG_MAX_WORDS[lang]
+        vocab = {}
+        ids = array('I')
+        totales = array('B')
+        palabras = array('H')
+        for c in lista:
+            ids.append(int(c.id[2:]))
+            totales.append(len(c.words))
+            fila = [vocab.setdefault(w, len(vocab)) for w in sorted(c.words)]
+            palabras.extend(fila + [VACIO] * (maximo - len(fila)))
+        if len(vocab) >= VACIO:
+            raise ValueError(f"Vocabulario de {lang} demasiado grande para el formato ({len(vocab)} palabras)")
+        tabla = bytearray()
+        for w in vocab:
+            b = w.encode('utf-8')
+            tabla += struct.pack("<H", len(b)) + b
+        if palabras.itemsize != 2 or ids.itemsize != 4:
+            raise RuntimeError("Tamaño de array inesperado en esta plataforma")
+        bloques.append((lang, maximo, len(lista), len(vocab), bytes(tabla),
+                        ids.tobytes(), totales.tobytes(), palabras.tobytes()))
+
+    offset = _alinear(CABECERA.size + SECCION.size * len(bloques))
+    secciones = []
+    for lang, maximo, n, n_vocab, *datos in bloques:
+        offsets = []
+        for d in datos:
+            offsets.append(offset)
+            offset = _alinear(offset + len(d))
+        secciones.append((lang, maximo, n, n_vocab, offsets, datos))
+
+    with open(path, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, len(secciones)))
+        for lang, maximo, n, n_vocab, offsets, _ in secciones:
+            f.write(SECCION.pack(lang.encode('ascii'), maximo, n, n_vocab, *offsets))
+        for _, _, _, _, offsets, datos in secciones:
+            for off, d in zip(offsets, datos):
+                f.write(b"\0" * (off - f.tell()))
+                f.write(d)
+
+
+class SeccionIdioma:
+    # Vista de solo lectura sobre los cartones de un idioma dentro del mmap
+    def __init__(self, buf, lang, maximo, n, n_vocab, off_vocab, off_ids, off_totales, off_palabras):
+        self.lang = lang
+        self.maximo = maximo
+        self.n = n
+        self.n_vocab = n_vocab
+        self._buf = buf
+        self._off_vocab = off_vocab
+        self.ids = buf[off_ids:off_ids + 4 * n].cast('I')
+        self.totales = buf[off_totales:off_totales + n]
+        self.palabras = buf[off_palabras:off_palabras + 2 * n * maximo].cast('H')
+        self._vocab = None
+        self._normalizadas = None
+
+    @property
+    def vocabulario(self):
+        # La tabla de palabras se decodifica la primera vez que se usa
+        if self._vocab is None:
+            vocab = []
+            off = self._off_vocab
+            for _ in range(self.n_vocab):
+                (largo,) = struct.unpack_from("<H", self._buf, off)
+                off += 2
+                vocab.append(bytes(self._buf[off:off + largo]).decode('utf-8'))
+                off += largo
+            self._vocab = vocab
+        return self._vocab
+
+    @property
+    def normalizadas(self):
+        # El vocabulario pasado por normalizar() una vez por palabra: el archivo
+        # pudo exportarse con otra configuración (BINGO_SIN_ACENTOS)
+        if self._normalizadas is None:
+            self._normalizadas = [normalizar(w) for w in self.vocabulario]
+        return self._normalizadas
+
+    def id_de(self, pos: int) -> str:
+        return f"{self.lang}{self.ids[pos]:06d}"
+
+    def indices(self, pos: int):
+        inicio = pos * self.maximo
+        return self.palabras[inicio:inicio + self.totales[pos]]
+
+    def carton(self, pos: int) -> Carton:
+        # El ID y el tamaño ya se validaron al exportar: no se repite el
+        # parseo de Carton(), solo las reglas de tamaño sobre el set final
+        vocab = self.normalizadas
+        return Carton.desde_normalizadas(self.id_de(pos), self.lang, {vocab[i] for i in self.indices(pos)})
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += self.n
+        if not 0 <= pos < self.n:
+            raise IndexError(pos)
+        return self.carton(pos)
+
+    def __iter__(self):
+        for pos in range(self.n):
+            yield self.carton(pos)
+
+    def __len__(self):
+        return self.n
+
+
+class ArchivoCartones:
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._f.close()
+            raise ValueError(f"Archivo binario vacío: {path}")
+        buf = memoryview(self._mm)
+        magia, version, n_secciones = CABECERA.unpack_from(buf, 0)
+        if magia != MAGIA or version != VERSION:
+            self.cerrar()
+            raise ValueError(f"{path} no es un archivo de cartones .bngp válido (versión {VERSION})")
+        self.secciones = {}
+        for i in range(n_secciones):
+            lang, maximo, n, n_vocab, *offsets = SECCION.unpack_from(buf, CABECERA.size + i * SECCION.size)
+            lang = lang.decode('ascii')
+            self.secciones[lang] = SeccionIdioma(buf, lang, maximo, n, n_vocab, *offsets)
+
+    def __getitem__(self, lang):
+        return self.secciones[lang]
+
+    def __iter__(self):
+        for seccion in self.secciones.values():
+            yield from seccion
+
+    def __len__(self):
+        return sum(s.n for s in self.secciones.values())
+
+    def cerrar(self):
+        # Las vistas deben soltarse antes de cerrar el mmap
+        self.secciones = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark reproducible de carga, marcado y detección de ganadores.
+# Genera cartones con semilla fija a partir de los vocabularios de CONFIG
+# (generar_csv.py), mide cada etapa y escribe una línea JSON por medición
+# para poder comparar ejecuciones y detectar regresiones.
+#
+# Uso: python benchmark.py --tamaños 1000 10000 100000 --semilla 1 --salida bench.jsonl
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import Bingo_P
+from generar_csv import CONFIG, MAX_POR_IDIOMA
+
+try:
+    import resource
+except ImportError:  # no existe en Windows
+    resource = None
+
+
+# El ID tiene 6 dígitos por idioma: por encima de esto los IDs generados no serían válidos
+MAX_CARTONES = MAX_POR_IDIOMA * len(CONFIG)
+
+
+def generar_archivos(n, directorio, semilla):
+    # Escribe los mismos n cartones en formato TXT y CSV, repartidos entre idiomas
+    rng = random.Random(semilla)
+    idiomas = list(CONFIG)
+    path_txt = os.path.join(directorio, f"bench_{n}.txt")
+    path_csv = os.path.join(directorio, f"bench_{n}.csv")
+    vocabularios = {lang: conf["vocab"].split() for lang, conf in CONFIG.items()}
+    with open(path_txt, 'w', encoding='utf-8') as ftxt, open(path_csv, 'w', encoding='utf-8', newline='') as fcsv:
+        fcsv.write("id,usuario,conjunto de palabras\n")
+        for i in range(n):
+            lang = idiomas[i % len(idiomas)]
+            vocab = vocabularios[lang]
+            limite = min(CONFIG[lang]["max"], len(vocab))
+            palabras = " ".join(rng.sample(vocab, rng.randint(5, limite)))
+            id_str = f"{lang}{i // len(idiomas):06d}"
+            ftxt.write(f"{id_str} {palabras}\n")
+            fcsv.write(f"{id_str},User_{lang}_{i},{palabras}\n")
+    return path_txt, path_csv
+
+
+def _cargar_bingo_p_clase():
+    # "bingo (1).py" no es un nombre de módulo válido; se importa por ruta
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bingo (1).py")
+    spec = importlib.util.spec_from_file_location("bingo_1", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.BingoP
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def memoria_maxima_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS lo devuelve en bytes, Linux en KB
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def medir(nombre, n, funcion, medir_memoria=False):
+    if medir_memoria:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - t0
+    registro = {"etapa": nombre, "cartones": n, "segundos": round(segundos, 6),
+                "cartones_por_segundo": round(n / segundos, 1) if segundos else None}
+    if medir_memoria:
+        registro["memoria_pico_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return resultado, registro
+
+
+def latencias_por_extraccion(nombre, n, extracciones, marcar):
+    tiempos = []
+    for palabra in extracciones:
+        t0 = time.perf_counter_ns()
+        marcar(palabra)
+        tiempos.append(time.perf_counter_ns() - t0)
+    total = sum(tiempos) / 1e9
+    return {"etapa": nombre, "cartones": n, "extracciones": len(tiempos),
+            "segundos": round(total, 6),
+            "extracciones_por_segundo": round(len(tiempos) / total, 1) if total else None,
+            "p50_us": round(percentil(tiempos, 0.50) / 1000, 2),
+            "p99_us": round(percentil(tiempos, 0.99) / 1000, 2)}
+
+
+def benchmark(n, directorio, semilla, max_extracciones, medir_memoria, incluir_bingo_p):
+    registros = []
+    path_txt, path_csv = generar_archivos(n, directorio, semilla)
+    silencio = io.StringIO()
+
+    with contextlib.redirect_stdout(silencio):
+        cartones, r = medir("cargar_cartones_desde_txt", n,
+                            lambda: Bingo_P.cargar_cartones_desde_txt(path_txt), medir_memoria)
+    r["cargados"] = len(cartones)
+    registros.append(r)
+    with contextlib.redirect_stdout(silencio):
+        cargados, r = medir("cargar_cartones_desde_csv", n,
+                            lambda: Bingo_P.cargar_cartones_desde_csv(path_csv), medir_memoria)
+    r["cargados"] = len(cargados)
+    registros.append(r)
+    with contextlib.redirect_stdout(silencio):
+        cargados, r = medir("cargar_cartones_desde_csv_rapido", n,
+                            lambda: Bingo_P.cargar_cartones_desde_csv_rapido(path_csv), medir_memoria)
+    r["cargados"] = len(cargados)
+    registros.append(r)
+    del cargados
+    _, r = medir("agrupar_por_id", n, lambda: Bingo_P.agrupar_por_id(cartones))
+    registros.append(r)
+
+    # Mismo orden de extracciones para todos los motores
+    rng = random.Random(semilla)
+    extracciones = {}
+    for lang, conf in CONFIG.items():
+        vocab = conf["vocab"].split()
+        rng.shuffle(vocab)
+        extracciones[lang] = vocab[:max_extracciones]
+
+    por_idioma = {}
+    for c in cartones:
+        por_idioma.setdefault(c.lang, []).append(c)
+    # La función de marcado original sobre el índice invertido, como referencia de los motores
+    for lang, lista in por_idioma.items():
+        indice = Bingo_P.construir_indice(lista)
+        registros.append(latencias_por_extraccion(
+            f"greedy_mark_and_check[{lang}]", len(lista), extracciones[lang],
+            lambda palabra: Bingo_P.greedy_mark_and_check(palabra, lista, indice)))
+    for c in cartones:
+        c.reiniciar()
+    for motor in Bingo_P.MOTORES:
+        try:
+            rondas, r = medir(f"preparar_ronda[{motor}]", n,
+                              lambda: {lang: Bingo_P.MOTORES[motor](lista) for lang, lista in por_idioma.items()})
+        except RuntimeError as e:  # p. ej. numpy no instalado
+            registros.append({"etapa": f"preparar_ronda[{motor}]", "cartones": n, "omitido": str(e)})
+            continue
+        registros.append(r)
+        for ronda in rondas.values():
+            if hasattr(ronda, "reiniciar"):
+                ronda.reiniciar()
+        for lang, ronda in rondas.items():
+            registros.append(latencias_por_extraccion(
+                f"marcar[{motor},{lang}]", len(por_idioma[lang]), extracciones[lang], ronda.marcar))
+        # Deja los cartones limpios para el siguiente motor
+        for c in cartones:
+            c.reiniciar()
+
+    if incluir_bingo_p:
+        BingoP = _cargar_bingo_p_clase()
+        bingo = BingoP()
+        with contextlib.redirect_stdout(silencio):
+            for c in cartones:
+                bingo.agregar_carton(c.id, list(c.words))
+            bingo.iniciar_partida()
+            todas = [p for lang in CONFIG for p in extracciones[lang]]
+            registros.append(latencias_por_extraccion(
+                "BingoP.procesar_palabra", n, todas, bingo.procesar_palabra))
+
+    for path in (path_txt, path_csv):
+        os.remove(path)
+    return registros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga y marcado de Bingo_P")
+    parser.add_argument("--tamaños", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help=f"número de cartones por ejecución (1k .. {MAX_CARTONES:,}; "
+                             f"el ID admite {MAX_POR_IDIOMA:,} por idioma)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--extracciones", type=int, default=50,
+                        help="palabras extraídas por idioma en las mediciones de marcado")
+    parser.add_argument("--memoria", action="store_true",
+                        help="mide el pico de memoria de la carga con tracemalloc (más lento)")
+    parser.add_argument("--sin-bingo-p", action="store_true",
+                        help="omite BingoP.procesar_palabra (recorre todos los cartones en cada palabra)")
+    parser.add_argument("--directorio", default=None, help="directorio temporal para los archivos generados")
+    parser.add_argument("--salida", default=None, help="archivo JSONL de salida (por defecto, la consola)")
+    args = parser.parse_args()
+    if any(n > MAX_CARTONES for n in args.tamaños):
+        parser.error(f"como máximo {MAX_CARTONES} cartones por ejecución (el ID tiene 6 dígitos por idioma)")
+
+    salida = open(args.salida, 'w', encoding='utf-8') if args.salida else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory(dir=args.directorio) as directorio:
+            for n in args.tamaños:
+                for registro in benchmark(n, directorio, args.semilla, args.extracciones,
+                                          args.memoria, not args.sin_bingo_p):
+                    registro["semilla"] = args.semilla
+                    registro["python"] = sys.version.split()[0]
+                    salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                salida.write(json.dumps({"etapa": "memoria_proceso", "cartones": n,
+                                         "rss_max_kb": memoria_maxima_kb()}) + "\n")
+                salida.flush()
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+
+if __name__ == '__main__':
+    main()
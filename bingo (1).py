@@ -1,25 +1,47 @@
-import random
-from typing import Dict, List, Set, Tuple
-from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 import os #para verificar existencia de archivos
 
+from Bingo_P import (ID_REGEX, LANG_MAX_WORDS, MOTORES, Carton, RegistroIds, aplicar_extracciones,
+                     configurar_normalizacion, normalizar)
+from consultas import ConsultaCartones
+
 class BingoP:
-    """Sistema de gestión de partidas de bingo con palabras"""
+    """Sistema de gestión de partidas de bingo con palabras
+    
+    Usa el núcleo de Bingo_P: Carton para las reglas de validación y un motor
+    de MOTORES ('indice', 'bits', 'numpy' o 'fragmentado') para el marcado.
+    """
     
-    # Configuración de idiomas
+    # Configuración de idiomas (los máximos salen de Bingo_P.LANG_MAX_WORDS)
     IDIOMAS = {
-        'SP': {'nombre': 'Español', 'max_palabras': 24},
-        'EN': {'nombre': 'Inglés', 'max_palabras': 14},
-        'PT': {'nombre': 'Portugués', 'max_palabras': 20},
-        'DT': {'nombre': 'Dutch', 'max_palabras': 10}
+        'SP': {'nombre': 'Español', 'max_palabras': LANG_MAX_WORDS['SP']},
+        'EN': {'nombre': 'Inglés', 'max_palabras': LANG_MAX_WORDS['EN']},
+        'PT': {'nombre': 'Portugués', 'max_palabras': LANG_MAX_WORDS['PT']},
+        'DT': {'nombre': 'Dutch', 'max_palabras': LANG_MAX_WORDS['DT']}
     }
     
-    def __init__(self):
+    # Máximo de cartones que se listan de una vez en las vistas de estado
+    MAX_LISTADO = 20
+    
+    def __init__(self, motor: str = "indice"):
         """Inicializa el sistema de bingo"""
-        self.cartones: Dict[str, Dict] = {}
-        self.palabras_marcadas: Dict[str, Set[str]] = defaultdict(set)
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES)})")
+        self.nombre_motor = motor
+        self.motor = None
+        self.cartones: Dict[str, Carton] = {}
+        # Misma colección en orden de carga, con conteos por idioma al día
+        self.consulta = ConsultaCartones()
+        # Palabras anunciadas en la partida, en orden (dict como conjunto ordenado);
+        # las marcas de un cartón son su intersección
+        self.anunciadas: Dict[str, None] = {}
+        self.ganadores: List[str] = []
+        # Ganadores que aparecieron al reconstruir el motor, aún sin devolver
+        self._reaplicados: List[str] = []
         self.orden_rondas: List[str] = []
+        # Registro de IDs compartido con Bingo_P para detectar duplicados
+        self.registro_ids = RegistroIds()
         
     #------------- SE AGREGÓ ESTA NUEVA FUNCIÓN PARA CARGA MASIVA DE CARTONES MEDIANTE ARCHIVO .TXT----------------------------#
     
@@ -32,15 +54,17 @@ class BingoP:
         try:
             # Abre el archivo en modo lectura con soporte para caracteres especiales
             with open(nombre_archivo, 'r', encoding='utf-8') as f:
-                lineas = f.readlines()
-                for linea in lineas:
+                detalles = len(self.registro_ids.detalles)
+                for num_linea, linea in enumerate(f, 1):
                     # Divide la línea: partes[0] es el ID, partes[1:] son las palabras
                     partes = linea.strip().split()
                     if len(partes) >= 2:
                         id_carton = partes[0]
                         palabras = partes[1:]
                         # Intenta registrar el cartón usando la validación existente
-                        self.agregar_carton(id_carton, palabras)
+                        self.agregar_carton(id_carton, palabras, nombre_archivo, num_linea)
+            for mensaje in self.registro_ids.reporte(detalles):
+                print(mensaje)
             return True
         
         except Exception as e:
@@ -53,49 +77,60 @@ class BingoP:
         
     def validar_id_carton(self, id_carton: str) -> bool:
         """Valida el formato del identificador del cartón"""
-        if len(id_carton) != 8:
-            return False
-        
-        idioma = id_carton[:2].upper()
-        numeros = id_carton[2:]
-        
-        if idioma not in self.IDIOMAS:
-            return False
-        
-        if not numeros.isdigit():
-            return False
-            
-        return True
+        return ID_REGEX.match(id_carton) is not None
     
-    def agregar_carton(self, id_carton: str, palabras: List[str]) -> bool:
+    def agregar_carton(self, id_carton: str, palabras: List[str],
+                       origen: str = "manual", linea: int = None) -> bool:
         """Agrega un cartón al sistema"""
-        id_carton = id_carton.upper()
+        id_carton = id_carton.strip().upper()
         
         if not self.validar_id_carton(id_carton):
             print(f" Error: ID de cartón inválido '{id_carton}'")
             return False
         
-        idioma = id_carton[:2]
-        max_palabras = self.IDIOMAS[idioma]['max_palabras']
-        
-        if len(palabras) > max_palabras:
-            print(f" Error: Cartón {id_carton} excede el máximo de {max_palabras} palabras")
+        if id_carton in self.registro_ids:
+            self.registro_ids.agregar(id_carton, origen, linea)
+            # En la carga masiva los duplicados se reportan juntos al final
+            if linea is None:
+                print(f" Error: Ya existe un cartón con ID {id_carton}")
             return False
         
-        # Convertir palabras a minúsculas y eliminar duplicados
-        palabras_unicas = list(set(p.lower().strip() for p in palabras if p.strip()))
-        
-        self.cartones[id_carton] = {
-            'idioma': idioma,
-            'palabras': set(palabras_unicas),
-            'total_palabras': len(palabras_unicas)
-        }
+        # Mismas reglas que Bingo_P: el máximo se cuenta tras quitar palabras repetidas
+        try:
+            carton = Carton(id_carton, palabras)
+        except ValueError as e:
+            print(f" Error: {e}")
+            return False
         
-        self.palabras_marcadas[id_carton] = set()
+        self.cartones[id_carton] = carton
+        self.consulta.append(carton)
+        self.registro_ids.agregar(id_carton, origen, linea)
+        # El motor se vuelve a construir con el nuevo cartón en la próxima palabra
+        self.motor = None
         
-        print(f"✓ Cartón {id_carton} agregado con {len(palabras_unicas)} palabras")
+        print(f"✓ Cartón {id_carton} agregado con {len(carton.words)} palabras")
         return True
     
+    def _obtener_motor(self):
+        """Construye el motor de marcado si hace falta, reaplicando lo ya anunciado"""
+        if self.motor is None:
+            for carton in self.cartones.values():
+                carton.reiniciar()
+            self.motor = MOTORES[self.nombre_motor](list(self.cartones.values()))
+            # Un cartón agregado a mitad de partida puede completarse con las
+            # palabras ya anunciadas: se registra y se anuncia como ganador
+            for palabra in self.anunciadas:
+                for carton in self.motor.marcar(palabra):
+                    if carton.id not in self.ganadores:
+                        print(f"   ★ {carton.id} se completa con las palabras ya anunciadas")
+                        self.ganadores.append(carton.id)
+                        self._reaplicados.append(carton.id)
+        return self.motor
+    
+    def _tomar_reaplicados(self) -> List[str]:
+        ganadores, self._reaplicados = self._reaplicados, []
+        return ganadores
+    
     def iniciar_partida(self):
         """Inicializa una nueva partida estableciendo orden aleatorio de rondas"""
         if not self.cartones:
@@ -103,14 +138,19 @@ class BingoP:
             return False
         
         # Determinar qué idiomas están presentes
-        idiomas_presentes = set(carton['idioma'] for carton in self.cartones.values())
+        idiomas_presentes = set(self.consulta.conteo_por_idioma())
         
         # Establecer orden aleatorio
         self.orden_rondas = list(idiomas_presentes)
+        import random
         random.shuffle(self.orden_rondas)
         
         # Reiniciar palabras marcadas
-        self.palabras_marcadas = {id_c: set() for id_c in self.cartones.keys()}
+        self.anunciadas = {}
+        self.ganadores = []
+        self._reaplicados = []
+        self.motor = None
+        self._obtener_motor()
         
         print("\n" + "="*60)
         print("NUEVA PARTIDA INICIADA")
@@ -123,21 +163,10 @@ class BingoP:
     
     def procesar_palabra(self, palabra: str) -> List[str]:
         """Procesa una palabra anunciada y retorna los cartones ganadores"""
-        palabra = palabra.lower().strip()
-        ganadores = []
-        
+        palabra = normalizar(palabra)
         print(f"\n Palabra anunciada: '{palabra}'")
         
-        # Marcar la palabra en todos los cartones que la contengan
-        cartones_marcados = 0
-        for id_carton, datos_carton in self.cartones.items():
-            if palabra in datos_carton['palabras']:
-                self.palabras_marcadas[id_carton].add(palabra)
-                cartones_marcados += 1
-                
-                # Verificar si el cartón es ganador
-                if len(self.palabras_marcadas[id_carton]) == datos_carton['total_palabras']:
-                    ganadores.append(id_carton)
+        cartones_marcados, ganadores = self._marcar_palabra(palabra)
         
         if cartones_marcados > 0:
             print(f"   ✓ Marcada en {cartones_marcados} cartón(es)")
@@ -146,6 +175,40 @@ class BingoP:
         
         return ganadores
     
+    def procesar_palabras(self, palabras) -> Tuple[Optional[int], List[str]]:
+        """Aplica en bloque una secuencia de palabras, sin imprimir nada.
+        
+        Usa aplicar_extracciones de Bingo_P: se detiene en la primera palabra
+        que produce ganadores y retorna (número de palabra, contando desde 1,
+        ganadores); si nadie gana retorna (None, []). Si al reconstruir el
+        motor ya hay ganadores nuevos retorna (0, ganadores) sin aplicar nada.
+        """
+        def anunciar():
+            # Solo quedan anunciadas las palabras que llegan a aplicarse
+            for palabra in palabras:
+                palabra = normalizar(palabra)
+                self.anunciadas[palabra] = None
+                yield palabra
+        
+        motor = self._obtener_motor()
+        reaplicados = self._tomar_reaplicados()
+        if reaplicados:
+            return 0, reaplicados
+        n, cartones = aplicar_extracciones(motor, anunciar())
+        ganadores = [c.id for c in cartones]
+        self.ganadores.extend(ganadores)
+        return n, ganadores
+    
+    def _marcar_palabra(self, palabra: str) -> Tuple[int, List[str]]:
+        """Marca una palabra ya normalizada; retorna (cartones marcados, ganadores)"""
+        motor = self._obtener_motor()
+        reaplicados = self._tomar_reaplicados()
+        self.anunciadas[palabra] = None
+        # El motor solo devuelve los cartones que se completaron con esta palabra
+        ganadores = [c.id for c in motor.marcar(palabra)]
+        self.ganadores.extend(ganadores)
+        return motor.beneficiados(palabra), reaplicados + ganadores
+    
     def jugar_ronda(self, palabras_anunciadas: List[str], nombre_ronda: str = ""):
         """Procesa una ronda completa con múltiples palabras"""
         if nombre_ronda:
@@ -153,20 +216,16 @@ class BingoP:
             print(f"RONDA: {nombre_ronda}")
             print(f"{'='*60}")
         
-        ganadores_ronda = []
-        
-        for palabra in palabras_anunciadas:
-            ganadores = self.procesar_palabra(palabra)
-            ganadores_ronda.extend(ganadores)
-            
-            if ganadores:
-                break  # Si hay ganadores, termina la ronda
+        # Las palabras se aplican en bloque; solo se imprime el resumen
+        n, ganadores_ronda = self.procesar_palabras(palabras_anunciadas)
         
         print(f"\n{'─'*60}")
+        if n:
+            print(f"Ronda decidida en la palabra número {n}")
         if ganadores_ronda:
             print(f"GANADOR(ES) DE LA RONDA:")
             for ganador in ganadores_ronda:
-                idioma = self.IDIOMAS[self.cartones[ganador]['idioma']]['nombre']
+                idioma = self.IDIOMAS[self.cartones[ganador].lang]['nombre']
                 print(f"   • {ganador} ({idioma})")
         else:
             print("   No hubo cartones ganadores en esta ronda")
@@ -180,13 +239,13 @@ class BingoP:
             print(f"Cartón {id_carton} no encontrado")
             return
         
-        datos = self.cartones[id_carton]
-        marcadas = self.palabras_marcadas[id_carton]
+        carton = self.cartones[id_carton]
+        marcadas = carton.words & self.anunciadas.keys()
         
         print(f"\n{'='*60}")
         print(f"Cartón: {id_carton}")
-        print(f"Idioma: {self.IDIOMAS[datos['idioma']]['nombre']}")
-        print(f"Progreso: {len(marcadas)}/{datos['total_palabras']} palabras")
+        print(f"Idioma: {self.IDIOMAS[carton.lang]['nombre']}")
+        print(f"Progreso: {len(marcadas)}/{len(carton.words)} palabras")
         print(f"{'='*60}")
         
         print("\nPalabras marcadas:")
@@ -197,7 +256,7 @@ class BingoP:
             print("  (ninguna)")
         
         print("\nPalabras pendientes:")
-        pendientes = datos['palabras'] - marcadas
+        pendientes = carton.words - marcadas
         if pendientes:
             for palabra in sorted(pendientes):
                 print(f"  ○ {palabra}")
@@ -212,30 +271,36 @@ class BingoP:
         print(f"{'='*60}")
         print(f"Total de cartones: {len(self.cartones)}")
         
-        # Cartones por idioma
-        cartones_por_idioma = defaultdict(int)
-        for carton in self.cartones.values():
-            cartones_por_idioma[carton['idioma']] += 1
-        
+        # Cartones por idioma (conteos mantenidos al agregar cada cartón)
         print("\nCartones por idioma:")
-        for idioma, cantidad in sorted(cartones_por_idioma.items()):
+        for idioma, cantidad in self.consulta.conteo_por_idioma().items():
             print(f"  • {self.IDIOMAS[idioma]['nombre']}: {cantidad}")
         
-        # Cartones ganadores
-        ganadores = [id_c for id_c, marcadas in self.palabras_marcadas.items()
-                     if len(marcadas) == self.cartones[id_c]['total_palabras']]
+        # Distribución de palabras pendientes, mantenida por el motor al marcar
+        if self.motor is not None:
+            niveles = ", ".join(f"{faltan}: {n}" for faltan, n in self.motor.distribucion().items())
+            print(f"\nPalabras pendientes -> cartones: {niveles}")
+        
+        # Cartones ganadores (se registran al completarse en procesar_palabra)
+        ganadores = self.ganadores
         
         print(f"\nCartones ganadores: {len(ganadores)}")
-        if ganadores:
-            for ganador in ganadores:
-                print(f"   {ganador}")
+        for ganador in ganadores[:self.MAX_LISTADO]:
+            print(f"   {ganador}")
+        if len(ganadores) > self.MAX_LISTADO:
+            print(f"   ... (y {len(ganadores) - self.MAX_LISTADO} más)")
         
         print(f"{'='*60}\n")
 
 
 def main():
     """Función principal para demostrar el sistema"""
-    bingo = BingoP()
+    if os.environ.get("BINGO_SIN_ACENTOS"):
+        configurar_normalizacion(plegar_acentos=True)
+    # El motor de marcado se elige al arrancar: BINGO_MOTOR=indice|bits|numpy
+    bingo = BingoP(os.environ.get("BINGO_MOTOR", "indice"))
+    import instrumentacion
+    instrumentado = instrumentacion.activar_desde_entorno(clase_bingo=BingoP)
     
     print("="*60)
     print("         SISTEMA BINGO_P - GESTIÓN DE CARTONES")
@@ -296,6 +361,8 @@ def main():
             bingo.estadisticas()
             
         elif opcion == '7':
+            if instrumentado:
+                instrumentacion.imprimir_volcado()
             print("\n¡Hasta luego!")
             break
             
@@ -304,4 +371,9 @@ def main():
 
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # Con argumentos se usa la interfaz no interactiva de Bingo_P (validar, jugar...)
+        from Bingo_P import cli
+        sys.exit(cli(sys.argv[1:]))
     main()
\ No newline at end of file
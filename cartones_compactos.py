@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Almacén compacto de cartones: cada idioma interna su vocabulario una sola vez
+# y cada cartón se guarda como una máscara de bits sobre ese vocabulario.
+# Las marcas no se guardan por cartón: dentro de una ronda todos los cartones
+# ven las mismas palabras extraídas, así que las marcas de un cartón son
+# mascara & sorteadas.
+
+from array import array
+from collections import Counter
+from sys import intern
+
+from Bingo_P import (LANG_MAX_WORDS, Carton, ReporteErrores, filas_mas_cercanas, iterar_cartones_desde_archivo,
+                     normalizar, validar_carton)
+
+
+class Vocabulario:
+    def __init__(self):
+        self.indices = {}
+        self.palabras = []
+
+    def indice(self, palabra: str) -> int:
+        # Devuelve el bit de la palabra, registrándola si es nueva
+        i = self.indices.get(palabra)
+        if i is None:
+            i = len(self.palabras)
+            # sys.intern evita guardar la misma cadena una vez por cartón
+            palabra = intern(palabra)
+            self.indices[palabra] = i
+            self.palabras.append(palabra)
+        return i
+
+    def buscar(self, palabra: str):
+        return self.indices.get(palabra)
+
+    def mascara(self, palabras) -> int:
+        m = 0
+        for w in palabras:
+            m |= 1 << self.indice(w)
+        return m
+
+    def palabras_de(self, mascara: int):
+        res = set()
+        i = 0
+        while mascara:
+            if mascara & 1:
+                res.add(self.palabras[i])
+            mascara >>= 1
+            i += 1
+        return res
+
+    def __len__(self):
+        return len(self.palabras)
+
+
+class AlmacenBits:
+    def __init__(self, lang: str = None):
+        # lang=None permite mezclar idiomas (entonces id_de no está disponible)
+        if lang is not None and lang not in LANG_MAX_WORDS:
+            raise ValueError(f"Idioma inválido: {lang}")
+        self.lang = lang
+        self.vocab = Vocabulario()
+        # Parte numérica del ID (el prefijo es siempre self.lang)
+        self.numeros = array('I')
+        self.mascaras = []
+        self.pendientes = array('B')
+        self.totales = array('B')
+        # bit de palabra -> posiciones de los cartones que la contienen
+        self.indice = []
+        self.sorteadas = 0
+
+    def agregar(self, numero: int, palabras):
+        pos = len(self.mascaras)
+        m = 0
+        for w in palabras:
+            bit = self.vocab.indice(w)
+            if bit == len(self.indice):
+                self.indice.append(array('I'))
+            self.indice[bit].append(pos)
+            m |= 1 << bit
+        self.numeros.append(numero)
+        self.mascaras.append(m)
+        self.totales.append(len(palabras))
+        # Si la ronda ya empezó, las palabras extraídas cuentan como marcadas
+        self.pendientes.append(len(palabras) - bin(m & self.sorteadas).count("1"))
+        return pos
+
+    @classmethod
+    def desde_seccion(cls, seccion):
+        # Desde una sección de un .bngp (archivo_binario.SeccionIdioma), leyendo
+        # los índices del mmap sin pasar por Carton
+        almacen = cls(seccion.lang)
+        vocab = seccion.normalizadas
+        for pos in range(len(seccion)):
+            almacen.agregar(seccion.ids[pos], {vocab[i] for i in seccion.indices(pos)})
+        return almacen
+
+    def id_de(self, pos: int) -> str:
+        return f"{self.lang}{self.numeros[pos]:06d}"
+
+    def carton(self, pos: int) -> Carton:
+        # Carton equivalente (sin marcas), para devolver ganadores o listar
+        return Carton.desde_normalizadas(self.id_de(pos), self.lang, self.vocab.palabras_de(self.mascaras[pos]))
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self.mascaras)
+        if not 0 <= pos < len(self.mascaras):
+            raise IndexError(pos)
+        return self.carton(pos)
+
+    def __iter__(self):
+        for pos in range(len(self.mascaras)):
+            yield self.carton(pos)
+
+    def mark(self, palabra: str):
+        # Marca la palabra en todos los cartones que la contienen y devuelve
+        # las posiciones de los que se completaron con ella, en orden de carga
+        bit = self.vocab.buscar(normalizar(palabra))
+        if bit is None:
+            return []
+        flag = 1 << bit
+        if self.sorteadas & flag:
+            return []
+        self.sorteadas |= flag
+        pendientes = self.pendientes
+        ganadores = []
+        for pos in self.indice[bit]:
+            pendientes[pos] -= 1
+            if pendientes[pos] == 0:
+                ganadores.append(pos)
+        return ganadores
+
+    def marcadas(self, pos: int) -> int:
+        return self.mascaras[pos] & self.sorteadas
+
+    def remaining(self, pos: int):
+        return self.vocab.palabras_de(self.mascaras[pos] & ~self.sorteadas)
+
+    def is_winner(self, pos: int) -> bool:
+        return self.mascaras[pos] & ~self.sorteadas == 0
+
+    def reiniciar(self):
+        self.sorteadas = 0
+        self.pendientes = array('B', self.totales)
+
+    def __len__(self):
+        return len(self.mascaras)
+
+
+class AlmacenCompacto:
+    def __init__(self):
+        self.por_idioma = {lang: AlmacenBits(lang) for lang in LANG_MAX_WORDS}
+
+    def agregar(self, id_str: str, words):
+        # Mismas reglas de validación que Carton (lanza ValueError)
+        id_limpio, lang, palabras = validar_carton(id_str, words)
+        self.por_idioma[lang].agregar(int(id_limpio[2:]), palabras)
+        return id_limpio
+
+    @classmethod
+    def desde_cartones(cls, cartones):
+        almacen = cls()
+        almacen.extend(cartones)
+        return almacen
+
+    def extend(self, cartones):
+        # Guarda cartones ya validados; los Carton no se conservan
+        añadidos = 0
+        for c in cartones:
+            self.por_idioma[c.lang].agregar(int(c.id[2:]), c.words)
+            añadidos += 1
+        return añadidos
+
+    def cargar_txt(self, path, vistos=None, errores=None):
+        # Carga directa desde un .txt sin crear objetos Carton intermedios, con
+        # las mismas reglas y mensajes que iterar_cartones_desde_txt
+        if errores is None:
+            errores = ReporteErrores()
+        añadidos = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_no, line in enumerate(f, 1):
+                    parts = line.split()
+                    if not parts:
+                        continue
+                    if len(parts) < 2:
+                        errores(f"[WARN] Línea {line_no}: formato inválido (se requiere ID y >=1 palabra). Línea ignorada.")
+                        continue
+                    try:
+                        id_limpio, lang, palabras = validar_carton(parts[0], parts[1:])
+                    except ValueError as e:
+                        errores(f"[ERROR] Línea {line_no}: {e}. Línea ignorada.")
+                        continue
+                    if vistos is not None and not vistos.agregar(id_limpio, path, line_no):
+                        continue
+                    self.por_idioma[lang].agregar(int(id_limpio[2:]), palabras)
+                    añadidos += 1
+        except FileNotFoundError:
+            errores(f"[ERROR] No se encontró el archivo TXT: {path}")
+        return añadidos
+
+    def cargar(self, path, vistos=None, errores=None):
+        # Cualquier formato de iterar_cartones_desde_archivo; el resto de
+        # formatos crean cada Carton solo de paso
+        if not path.lower().endswith(('.csv', '.bngp')):
+            return self.cargar_txt(path, vistos, errores)
+        return self.extend(iterar_cartones_desde_archivo(path, vistos, errores))
+
+    @property
+    def secciones(self):
+        # Misma forma que ArchivoCartones.secciones (ver preparar_rondas en Bingo_P)
+        return self.por_idioma
+
+    def __getitem__(self, lang):
+        return self.por_idioma[lang]
+
+    def __iter__(self):
+        for almacen in self.por_idioma.values():
+            yield from almacen
+
+    def __len__(self):
+        return sum(len(a) for a in self.por_idioma.values())
+
+
+class MotorBits:
+    # Motor de ronda sobre un AlmacenBits, con la misma interfaz que
+    # RondaIndice y MotorNumpy (ver MOTORES en Bingo_P)
+    def __init__(self, cartones_lista):
+        self.cartones = list(cartones_lista)
+        self.filas = {c.id: i for i, c in enumerate(self.cartones)}
+        self.almacen = AlmacenBits()
+        for c in self.cartones:
+            self.almacen.agregar(int(c.id[2:]), c.words)
+
+    @classmethod
+    def desde_almacen(cls, almacen):
+        # Motor sobre un AlmacenBits de un idioma (ver AlmacenCompacto) sin
+        # lista de Carton: se crean solo para devolver ganadores y consultas.
+        # Las marcas son las del almacén, así que se comparten con él.
+        motor = cls.__new__(cls)
+        motor.cartones = almacen
+        motor.filas = None
+        motor.almacen = almacen
+        return motor
+
+    def marcar(self, palabra: str):
+        return [self.cartones[i] for i in self.almacen.mark(palabra)]
+
+    def beneficiados(self, palabra: str) -> int:
+        bit = self.almacen.vocab.buscar(normalizar(palabra))
+        return 0 if bit is None else len(self.almacen.indice[bit])
+
+    def ganadores(self):
+        return [self.cartones[i] for i, p in enumerate(self.almacen.pendientes) if p == 0]
+
+    def faltan(self, carton) -> int:
+        if self.filas is None:
+            self.filas = {self.almacen.id_de(i): i for i in range(len(self.almacen))}
+        return self.almacen.pendientes[self.filas[carton.id]]
+
+    def mas_cercanos(self, k=10):
+        pendientes = self.almacen.pendientes
+        return [(self.cartones[i], pendientes[i]) for i in filas_mas_cercanas(pendientes, k)]
+
+    def distribucion(self):
+        return dict(sorted(Counter(self.almacen.pendientes).items()))
+
+    def reiniciar(self):
+        self.almacen.reiniciar()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Capa de consultas para colecciones grandes de cartones. Los agregados
+# (cartones por idioma) se actualizan al cargar cada cartón y el progreso se
+# pide al motor de la ronda, que ya lo mantiene al marcar; así las vistas de
+# estado cuestan lo que mide la página y no lo que mide la colección.
+# Los filtros son perezosos: se recorren solo hasta llenar la página pedida.
+
+from collections import Counter
+from itertools import islice
+
+from Bingo_P import VALID_LANGS
+
+
+class ConsultaCartones:
+    # Se comporta como la lista de cartones de siempre (append, extend, len,
+    # iteración en orden de carga) y además responde consultas
+    def __init__(self, cartones=()):
+        self.cartones = []
+        self.por_idioma = {}
+        self.conteos = Counter()
+        self.rondas = None
+        self.extend(cartones)
+
+    def append(self, carton):
+        self.cartones.append(carton)
+        self.por_idioma.setdefault(carton.lang, []).append(carton)
+        self.conteos[carton.lang] += 1
+
+    def extend(self, cartones):
+        for c in cartones:
+            self.append(c)
+
+    def __len__(self):
+        return len(self.cartones)
+
+    def __iter__(self):
+        return iter(self.cartones)
+
+    def __getitem__(self, i):
+        return self.cartones[i]
+
+    def vincular(self, rondas):
+        # rondas: idioma -> motor de MOTORES; de ahí salen las palabras pendientes
+        self.rondas = rondas
+
+    def conteo_por_idioma(self):
+        return dict(sorted(self.conteos.items()))
+
+    def faltan(self, carton) -> int:
+        ronda = self.rondas.get(carton.lang) if self.rondas else None
+        return ronda.faltan(carton) if ronda is not None else carton.pendientes
+
+    def distribucion(self, idioma):
+        # Cartones con 0, 1, 2... palabras pendientes; el motor la lleva al día
+        ronda = self.rondas.get(idioma) if self.rondas else None
+        if ronda is not None:
+            return ronda.distribucion()
+        return dict(sorted(Counter(c.pendientes for c in self.por_idioma.get(idioma, ())).items()))
+
+    def filtrar(self, idioma=None, prefijo=None, faltan_max=None):
+        # Generador de cartones que cumplen los filtros, en orden de carga.
+        # Con faltan_max sobre un motor con cubetas (RondaIndice) se recorren
+        # solo las cubetas de interés, así que salen ordenados por cercanía.
+        if prefijo:
+            prefijo = prefijo.strip().upper()
+            if idioma is None and prefijo[:2] in VALID_LANGS:
+                idioma = prefijo[:2]
+        fuente = self.por_idioma.get(idioma, []) if idioma else self.cartones
+        if faltan_max is not None and idioma:
+            cubetas = getattr(self.rondas.get(idioma) if self.rondas else None, "cubetas", None)
+            if cubetas is not None:
+                fuente = (c for cubeta in cubetas[:faltan_max + 1] for c in cubeta)
+                faltan_max = None
+        for c in fuente:
+            if prefijo and not c.id.startswith(prefijo):
+                continue
+            if faltan_max is not None and self.faltan(c) > faltan_max:
+                continue
+            yield c
+
+    def total(self, idioma=None, prefijo=None, faltan_max=None) -> int:
+        # Sin filtros o solo por idioma sale de los agregados; si no, se cuenta
+        if not prefijo and faltan_max is None:
+            return self.conteos[idioma] if idioma else len(self.cartones)
+        return sum(1 for _ in self.filtrar(idioma, prefijo, faltan_max))
+
+    def pagina(self, numero, tamaño=20, idioma=None, prefijo=None, faltan_max=None):
+        # Página `numero` (desde 0) del resultado de filtrar
+        inicio = numero * tamaño
+        if not prefijo and faltan_max is None:
+            fuente = self.por_idioma.get(idioma, []) if idioma else self.cartones
+            return fuente[inicio:inicio + tamaño]
+        return list(islice(self.filtrar(idioma, prefijo, faltan_max), inicio, inicio + tamaño))
+
+    def paginas(self, tamaño=20, idioma=None, prefijo=None, faltan_max=None):
+        # Recorre el resultado página a página sin volver a empezar cada vez
+        resultado = self.filtrar(idioma, prefijo, faltan_max)
+        while True:
+            pagina = list(islice(resultado, tamaño))
+            if not pagina:
+                return
+            yield pagina
+
+
+def leer_filtros(texto: str):
+    # "SP", "EN0001", "PT 3"...: un idioma, un prefijo de ID y/o un máximo de
+    # palabras pendientes, en cualquier orden
+    filtros = {}
+    for parte in texto.split():
+        if parte.isdigit():
+            filtros["faltan_max"] = int(parte)
+        elif parte.upper() in VALID_LANGS:
+            filtros["idioma"] = parte.upper()
+        else:
+            filtros["prefijo"] = parte.upper()
+    return filtros
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Diario de recuperación de partidas. Si el proceso muere a mitad de juego,
+# la partida se reconstruye con:
+#   base.bngp       cartones cargados (archivo binario, se escribe una vez al empezar)
+#   base.foto.json  foto compacta del estado, reescrita de forma atómica cada
+#                   `cada` extracciones y en cada cambio de ronda
+#   base.diario     diario de solo anexado: una línea JSON por evento
+# Las marcas de los cartones no se guardan una por una: dentro de una ronda
+# todos los cartones del idioma reciben las mismas palabras, así que las marcas
+# se reconstruyen exactamente volviendo a aplicar las extracciones de cada ronda.
+# Recuperar = abrir la foto + aplicar la cola del diario desde su offset.
+
+import json
+import os
+
+FOTO_VERSION = 1
+
+
+class EstadoPartida:
+    def __init__(self, orden, extracciones=None, completadas=None, actual=None, terminada=False):
+        self.orden = list(orden)
+        # idioma -> palabras extraídas en esa ronda, en orden
+        self.extracciones = extracciones or {}
+        self.completadas = list(completadas or [])
+        self.actual = actual
+        self.terminada = terminada
+        self.cartones = []
+
+    def aplicar(self, evento):
+        tipo = evento["e"]
+        if tipo == "orden":
+            self.orden = evento["idiomas"]
+        elif tipo == "ronda":
+            self.actual = evento["idioma"]
+        elif tipo == "palabra":
+            self.extracciones.setdefault(evento["idioma"], []).append(evento["p"])
+        elif tipo == "fin_ronda":
+            self.completadas.append(evento["idioma"])
+            self.actual = None
+        elif tipo == "fin":
+            self.terminada = True
+
+    def a_dict(self):
+        return {"orden": self.orden, "extracciones": self.extracciones,
+                "completadas": self.completadas, "actual": self.actual, "terminada": self.terminada}
+
+
+class Diario:
+    def __init__(self, base, cada=100, sincronizar=False):
+        self.base = base
+        self.ruta_diario = base + ".diario"
+        self.ruta_foto = base + ".foto.json"
+        self.ruta_cartones = base + ".bngp"
+        self.cada = cada
+        # fsync en cada evento: más lento, pero sobrevive también a un corte de luz
+        self.sincronizar = sincronizar
+        self.estado = None
+        self._f = None
+        self._desde_foto = 0
+
+    def iniciar(self, cartones, orden):
+        from archivo_binario import exportar_archivo
+        exportar_archivo(cartones, self.ruta_cartones)
+        self.estado = EstadoPartida(orden)
+        self._f = open(self.ruta_diario, 'w', encoding='utf-8')
+        self._escribir({"e": "orden", "idiomas": list(orden)})
+        self.foto()
+
+    def continuar(self, estado):
+        # Sigue escribiendo sobre el diario de una partida recuperada
+        self.estado = estado
+        self._f = open(self.ruta_diario, 'a', encoding='utf-8')
+        self.foto()
+
+    def _escribir(self, evento):
+        self._f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        self._f.flush()
+        if self.sincronizar:
+            os.fsync(self._f.fileno())
+        self.estado.aplicar(evento)
+
+    def ronda(self, idioma):
+        self._escribir({"e": "ronda", "idioma": idioma})
+        self.foto()
+
+    def palabra(self, idioma, palabra):
+        self._escribir({"e": "palabra", "idioma": idioma, "p": palabra})
+        self._desde_foto += 1
+        if self._desde_foto >= self.cada:
+            self.foto()
+
+    def fin_ronda(self, idioma):
+        self._escribir({"e": "fin_ronda", "idioma": idioma})
+        self.foto()
+
+    def fin(self, ganadores=()):
+        self._escribir({"e": "fin", "ganadores": [c.id for c in ganadores]})
+        self.foto()
+        self.cerrar()
+
+    def foto(self):
+        # Escritura atómica: se escribe a un temporal y se reemplaza
+        foto = {"version": FOTO_VERSION, "cartones": os.path.basename(self.ruta_cartones),
+                "offset": self._f.tell(), **self.estado.a_dict()}
+        temporal = self.ruta_foto + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(foto, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_foto)
+        self._desde_foto = 0
+
+    def cerrar(self):
+        if self._f is not None and not self._f.closed:
+            self._f.close()
+
+
+def recuperar(base):
+    # Devuelve el EstadoPartida de la última foto más la cola del diario. En
+    # estado.cartones queda abierto el ArchivoCartones de la partida (los
+    # cartones no se materializan; jugar() lo acepta tal cual) y lo cierra
+    # quien llama
+    from archivo_binario import ArchivoCartones
+    with open(base + ".foto.json", 'r', encoding='utf-8') as f:
+        foto = json.load(f)
+    if foto.get("version") != FOTO_VERSION:
+        raise ValueError(f"Versión de foto no soportada: {foto.get('version')}")
+    estado = EstadoPartida(foto["orden"], foto["extracciones"], foto["completadas"],
+                           foto["actual"], foto["terminada"])
+    try:
+        with open(base + ".diario", 'r', encoding='utf-8') as f:
+            f.seek(foto["offset"])
+            for linea in f:
+                try:
+                    evento = json.loads(linea)
+                except ValueError:
+                    break  # última línea a medio escribir cuando murió el proceso
+                estado.aplicar(evento)
+    except FileNotFoundError:
+        pass
+    ruta_cartones = os.path.join(os.path.dirname(base), foto["cartones"])
+    estado.cartones = ArchivoCartones(ruta_cartones)
+    return estado
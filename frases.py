@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Modo de cartones-frase para archivos tipo frases_infantiles_1000.csv, donde
+# cada cartón es una oración completa. La frase se tokeniza (sin puntuación),
+# se normaliza igual que el resto de palabras y se le quitan las palabras
+# vacías del idioma ("la", "the", "de"...), que no aportan al juego.
+# El resultado se guarda en caché por frase: en corpus grandes las mismas
+# frases se repiten muchas veces y solo se tokenizan la primera.
+#
+# Uso:
+#   python frases.py frases_infantiles_1000.csv [--recortar] [--con-vacias]
+# En el menú de Bingo_P, BINGO_FRASES=1 hace que la opción 2 use este modo.
+
+import re
+
+from Bingo_P import LANG_MAX_WORDS, iterar_cartones_desde_csv_rapido, normalizar
+
+PALABRAS_VACIAS = {
+    "SP": "el la los las un una unos unas y e o u ni que de del a al en con por para su sus se "
+          "lo le les mi mis tu tus es son muy mas más pero como cuando mientras sin sobre entre "
+          "hasta desde ya no",
+    "EN": "the a an and or but of to in on at for with by from is are was were be it its his her "
+          "their they he she we you i as that this so very while when into",
+    "PT": "o a os as um uma uns umas e ou de do da dos das em no na nos nas com por para pelo pela "
+          "seu sua seus suas que se muito mas como quando enquanto sem sobre ao aos",
+    "DT": "de het een en of in op aan met voor van te bij naar is was zijn hij zij ze wij we die "
+          "dat dit als maar zo heel terwijl",
+}
+
+# Secuencias de letras, admitiendo apóstrofos y guiones internos (dog's, bem-vindo)
+PATRON_PALABRA = r"[^\W\d_]+(?:['’-][^\W\d_]+)*"
+
+
+class Tokenizador:
+    def __init__(self, patron=PATRON_PALABRA, palabras_vacias=None, recortar=False, max_cache=65536):
+        # palabras_vacias: idioma -> iterable; None usa PALABRAS_VACIAS, {} no quita ninguna.
+        # recortar: si la frase supera LANG_MAX_WORDS se quedan las primeras palabras
+        # en vez de rechazar el cartón.
+        self.buscar = re.compile(patron).findall
+        if palabras_vacias is None:
+            palabras_vacias = {lang: texto.split() for lang, texto in PALABRAS_VACIAS.items()}
+        self.vacias = {lang: frozenset(normalizar(w) for w in palabras)
+                       for lang, palabras in palabras_vacias.items()}
+        self.recortar = recortar
+        self.max_cache = max_cache
+        self.cache = {}
+        self.aciertos = 0
+
+    def __call__(self, lang: str, frase: str):
+        # Palabras normalizadas de la frase (frozenset); se calcula una vez por frase
+        clave = (lang, frase)
+        palabras = self.cache.get(clave)
+        if palabras is not None:
+            self.aciertos += 1
+            return palabras
+        vacias = self.vacias.get(lang, ())
+        # dict.fromkeys quita repetidas conservando el orden de la frase
+        orden = [w for w in dict.fromkeys(map(normalizar, self.buscar(frase))) if w not in vacias]
+        if self.recortar:
+            orden = orden[:LANG_MAX_WORDS[lang]]
+        palabras = frozenset(orden)
+        if len(self.cache) < self.max_cache:
+            self.cache[clave] = palabras
+        return palabras
+
+
+def iterar_cartones_desde_frases(path, vistos=None, errores=None, tokenizador=None, delimitador=None):
+    # Misma lectura que iterar_cartones_desde_csv_rapido, tokenizando cada frase
+    if tokenizador is None:
+        tokenizador = Tokenizador()
+    return iterar_cartones_desde_csv_rapido(path, vistos, errores, delimitador, tokenizar=tokenizador)
+
+
+def cargar_cartones_desde_frases(path, tokenizador=None, delimitador=None):
+    from Bingo_P import gc_pausado
+    with gc_pausado():
+        return list(iterar_cartones_desde_frases(path, tokenizador=tokenizador, delimitador=delimitador))
+
+
+def main():
+    import argparse
+    import time
+    from Bingo_P import RegistroIds, ReporteErrores
+
+    parser = argparse.ArgumentParser(description="Carga cartones-frase y muestra cómo quedan tokenizados")
+    parser.add_argument("archivo", help="CSV con columnas id y 'conjunto de palabras' (frases)")
+    parser.add_argument("--recortar", action="store_true",
+                        help="recorta las frases largas a LANG_MAX_WORDS en vez de rechazarlas")
+    parser.add_argument("--con-vacias", action="store_true", help="no quita las palabras vacías")
+    parser.add_argument("--delimitador", help="separador del CSV (por defecto se deduce de la cabecera)")
+    parser.add_argument("--muestra", type=int, default=5, help="cartones de ejemplo a mostrar")
+    args = parser.parse_args()
+
+    tokenizador = Tokenizador(palabras_vacias={} if args.con_vacias else None, recortar=args.recortar)
+    errores = ReporteErrores(mostrar=False)
+    vistos = RegistroIds()
+    inicio = time.perf_counter()
+    cartones = list(iterar_cartones_desde_frases(args.archivo, vistos, errores, tokenizador, args.delimitador))
+    segundos = time.perf_counter() - inicio
+
+    for c in cartones[:args.muestra]:
+        print(f"{c.id} ({len(c.words)}): {' '.join(sorted(c.words))}")
+    for mensaje in errores.errores:
+        print(mensaje)
+    print(f"{len(cartones)} cartones cargados en {segundos:.2f}s, {errores.total} rechazados, "
+          f"{vistos.duplicados} duplicados; {len(tokenizador.cache)} frases distintas, "
+          f"{tokenizador.aciertos} reutilizadas de la caché.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
+import argparse
 import csv
+import itertools
+import os
 import random
 
 CONFIG = {
@@ -8,42 +11,99 @@ CONFIG = {
     "DT": {"max": 10, "file": "bingo_test_DT.csv", "vocab": "de het een kat hond huis boom zon maan ster hemel blauw rood groen geel zwart wit rennen springen spelen eten slapen dromen groot klein snel langzaam blij droevig vriend familie school boek tafel stoel"}
 }
 
-def generar_csv_idioma(lang_code, num_cartones=50):
+MAX_POR_IDIOMA = 1_000_000  # el ID solo tiene 6 dígitos
+
+
+def generar_cartones(lang_code, inicio, cantidad, rng):
+    # Genera filas (id, usuario, frase) válidas para Carton, sin escribirlas
     conf = CONFIG[lang_code]
     palabras_fuente = conf["vocab"].split()
-    filename = conf["file"]
     limite = conf["max"]
-    
-    print(f"Generando {filename} ({num_cartones} cartones)...")
-    
-    with open(filename, mode='w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['id', 'usuario', 'conjunto de palabras']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        
-        for i in range(num_cartones):
-            id_str = f"{lang_code}{i:06d}"
-            
-            usuario = f"User_{lang_code}_{i}"
-            
-            num_palabras = random.randint(5, limite)
-            seleccion = random.sample(palabras_fuente, min(num_palabras, len(palabras_fuente)))
-            
-            frase = " ".join(seleccion)
-            
-            writer.writerow({
-                'id': id_str,
-                'usuario': usuario,
-                'conjunto de palabras': frase
-            })
+    tope = min(limite, len(palabras_fuente))
+    sample = rng.sample
+    randint = rng.randint
+    for i in range(inicio, inicio + cantidad):
+        seleccion = sample(palabras_fuente, randint(min(5, tope), tope))
+        yield f"{lang_code}{i:06d}", f"User_{lang_code}_{i}", " ".join(seleccion)
+
+
+def escribir_fragmento(lang_code, inicio, cantidad, filename, formato="csv", semilla=None, tamaño_bloque=50_000):
+    # Escribe un archivo por bloques: cada bloque se arma en memoria y se
+    # vuelca con una sola escritura en vez de una llamada por fila
+    rng = random.Random(f"{semilla}-{lang_code}-{inicio}") if semilla is not None else random.Random()
+    filas = generar_cartones(lang_code, inicio, cantidad, rng)
+    with open(filename, mode='w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        if formato == "csv":
+            writer = csv.writer(f)
+            writer.writerow(['id', 'usuario', 'conjunto de palabras'])
+            while True:
+                bloque = list(itertools.islice(filas, tamaño_bloque))
+                if not bloque:
+                    break
+                writer.writerows(bloque)
+        else:
+            # Formato que lee cargar_cartones_desde_txt: "ID palabra palabra ..."
+            while True:
+                bloque = [f"{id_str} {frase}\n" for id_str, _, frase in itertools.islice(filas, tamaño_bloque)]
+                if not bloque:
+                    break
+                f.write("".join(bloque))
+    return filename
+
+
+def _escribir_fragmento(args):
+    return escribir_fragmento(*args)
+
+
+def generar_csv_idioma(lang_code, num_cartones=50, semilla=None, formato="csv",
+                       fragmentos=1, procesos=1, directorio=".", tamaño_bloque=50_000):
+    conf = CONFIG[lang_code]
+    if num_cartones > MAX_POR_IDIOMA:
+        raise ValueError(f"Máximo {MAX_POR_IDIOMA} cartones por idioma (el ID tiene 6 dígitos)")
+    base, _ = os.path.splitext(conf["file"])
+    extension = ".csv" if formato == "csv" else ".txt"
+
+    # Reparte los cartones en `fragmentos` archivos numerados con IDs contiguos
+    tareas = []
+    por_fragmento = -(-num_cartones // fragmentos)
+    for n in range(fragmentos):
+        inicio = n * por_fragmento
+        cantidad = min(por_fragmento, num_cartones - inicio)
+        if cantidad <= 0:
+            break
+        nombre = base + (f"_{n:03d}" if fragmentos > 1 else "") + extension
+        tareas.append((lang_code, inicio, cantidad, os.path.join(directorio, nombre),
+                       formato, semilla, tamaño_bloque))
+
+    print(f"Generando {num_cartones} cartones {lang_code} en {len(tareas)} archivo(s)...")
+    if procesos > 1 and len(tareas) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return list(pool.map(_escribir_fragmento, tareas))
+    return [escribir_fragmento(*t) for t in tareas]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera cartones de prueba para Bingo_P")
+    parser.add_argument("-n", "--cartones", type=int, default=50, help="cartones por idioma")
+    parser.add_argument("--idiomas", nargs="+", default=list(CONFIG), choices=list(CONFIG))
+    parser.add_argument("--semilla", type=int, default=None, help="semilla para resultados reproducibles")
+    parser.add_argument("--formato", choices=["csv", "txt"], default="csv")
+    parser.add_argument("--fragmentos", type=int, default=1, help="archivos numerados por idioma")
+    parser.add_argument("--procesos", type=int, default=1, help="procesos para escribir fragmentos en paralelo")
+    parser.add_argument("--directorio", default=".")
+    parser.add_argument("--bloque", type=int, default=50_000, help="filas por escritura")
+    args = parser.parse_args()
+
+    generados = []
+    for lang in args.idiomas:
+        generados += generar_csv_idioma(lang, args.cartones, args.semilla, args.formato,
+                                        args.fragmentos, args.procesos, args.directorio, args.bloque)
 
-if __name__ == "__main__":
-    for lang in ["SP", "EN", "PT", "DT"]:
-        generar_csv_idioma(lang)
-    
     print("\n¡Archivos generados exitosamente!")
-    print(" - bingo_test_SP.csv")
-    print(" - bingo_test_EN.csv")
-    print(" - bingo_test_PT.csv")
-    print(" - bingo_test_DT.csv")
\ No newline at end of file
+    for nombre in generados:
+        print(f" - {nombre}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Grabación y reproducción de partidas. Una grabación (.bngr) es un archivo de
+# líneas JSON: la primera es la cabecera (semilla del orden de rondas, orden,
+# número de cartones y huella SHA-256 de los cartones en orden de carga) y las
+# siguientes son los eventos de jugar() con su instante "t" en segundos desde
+# el inicio, con el mismo vocabulario que el diario de recuperación.
+#
+# La reproducción no vuelve a pasar por input(): aplica las extracciones de
+# cada ronda en bloque sobre motores ya construidos, que se reinician entre
+# partidas, así que miles de partidas archivadas se repiten en segundos.
+#
+# Uso:
+#   BINGO_GRABAR=partidas python Bingo_P.py          (graba cada juego de la opción 5)
+#   python grabacion.py cartones.txt partidas/*.bngr [--motor bits]
+
+import hashlib
+import json
+import os
+import time
+
+VERSION = 1
+
+
+def huella_cartones(cartones) -> str:
+    # Cambia si cambia cualquier cartón o el orden de carga (que decide el
+    # orden de los ganadores)
+    h = hashlib.sha256()
+    for c in cartones:
+        h.update(f"{c.id}:{' '.join(sorted(c.words))}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def ruta_nueva(directorio) -> str:
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, f"partida-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.bngr")
+
+
+class Grabacion:
+    # Se pasa a jugar(..., grabacion=...) y recibe los mismos eventos que el Diario
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._f = None
+        self._inicio = None
+
+    def iniciar(self, cartones, orden, semilla=None, previas=None):
+        # previas: extracciones ya hechas al reanudar una partida (idioma -> palabras)
+        self._f = open(self.ruta, 'w', encoding='utf-8')
+        self._inicio = time.monotonic()
+        cabecera = {"version": VERSION, "inicio": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "semilla": semilla, "orden": list(orden),
+                    "cartones": len(cartones), "huella": huella_cartones(cartones)}
+        self._f.write(json.dumps(cabecera, ensure_ascii=False) + "\n")
+        for idioma, palabras in (previas or {}).items():
+            for palabra in palabras:
+                self.palabra(idioma, palabra)
+
+    def _escribir(self, evento):
+        evento["t"] = round(time.monotonic() - self._inicio, 4)
+        self._f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def ronda(self, idioma):
+        self._escribir({"e": "ronda", "idioma": idioma})
+
+    def palabra(self, idioma, palabra):
+        self._escribir({"e": "palabra", "idioma": idioma, "p": palabra})
+
+    def fin_ronda(self, idioma):
+        self._escribir({"e": "fin_ronda", "idioma": idioma})
+
+    def fin(self, ganadores=()):
+        self._escribir({"e": "fin", "ganadores": [c.id for c in ganadores]})
+        self.cerrar()
+
+    def cerrar(self):
+        if self._f is not None and not self._f.closed:
+            self._f.close()
+
+
+class PartidaGrabada:
+    def __init__(self, cabecera):
+        self.cabecera = cabecera
+        self.orden = cabecera["orden"]
+        self.huella = cabecera["huella"]
+        # idioma -> palabras extraídas, y (t, idioma, palabra) de cada extracción
+        self.extracciones = {}
+        self.tiempos = []
+        # IDs ganadores grabados; None si la partida no llegó a terminar
+        self.ganadores = None
+
+
+def leer_grabacion(ruta) -> PartidaGrabada:
+    with open(ruta, 'r', encoding='utf-8') as f:
+        cabecera = json.loads(f.readline())
+        if cabecera.get("version") != VERSION:
+            raise ValueError(f"Versión de grabación no soportada: {cabecera.get('version')}")
+        partida = PartidaGrabada(cabecera)
+        for linea in f:
+            try:
+                evento = json.loads(linea)
+            except ValueError:
+                break  # última línea a medio escribir
+            if evento["e"] == "palabra":
+                partida.extracciones.setdefault(evento["idioma"], []).append(evento["p"])
+                partida.tiempos.append((evento["t"], evento["idioma"], evento["p"]))
+            elif evento["e"] == "fin":
+                partida.ganadores = evento["ganadores"]
+    return partida
+
+
+class ResultadoReproduccion:
+    def __init__(self, idioma, extraccion, ganadores, segundos, grabados):
+        self.idioma = idioma
+        self.extraccion = extraccion
+        self.ganadores = [c.id for c in ganadores]
+        self.segundos = segundos
+        self.grabados = grabados
+
+    @property
+    def coincide(self) -> bool:
+        # Sin "fin" grabado no hay resultado con el que comparar
+        return self.grabados is None or self.ganadores == self.grabados
+
+    def a_dict(self):
+        return {"idioma": self.idioma, "extraccion": self.extraccion, "ganadores": self.ganadores,
+                "coincide": self.coincide, "segundos": round(self.segundos, 6)}
+
+
+class Reproductor:
+    # Construye los motores una vez por conjunto de cartones y repite sobre
+    # ellos cualquier número de partidas grabadas con esos cartones
+    def __init__(self, cartones, motor="indice"):
+        from Bingo_P import MOTORES
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES)})")
+        self.cartones = list(cartones)
+        self.huella = huella_cartones(self.cartones)
+        por_idioma = {}
+        for c in self.cartones:
+            por_idioma.setdefault(c.lang, []).append(c)
+        self.rondas = {lang: MOTORES[motor](lista) for lang, lista in por_idioma.items()}
+
+    def reproducir(self, partida: PartidaGrabada) -> ResultadoReproduccion:
+        from Bingo_P import aplicar_extracciones
+        if partida.huella != self.huella:
+            raise ValueError("La grabación se hizo con otros cartones (la huella no coincide)")
+        for ronda in self.rondas.values():
+            ronda.reiniciar()
+        idioma, extraccion, ganadores = None, None, []
+        inicio = time.perf_counter()
+        # Mismo recorrido que jugar(): rondas sin cartones se omiten y la
+        # partida termina en la primera extracción con ganadores
+        for lang in partida.orden:
+            ronda = self.rondas.get(lang)
+            if ronda is None:
+                continue
+            n, ganadores = aplicar_extracciones(ronda, partida.extracciones.get(lang, []))
+            if ganadores:
+                idioma, extraccion = lang, n
+                break
+        segundos = time.perf_counter() - inicio
+        return ResultadoReproduccion(idioma, extraccion, ganadores, segundos, partida.ganadores)
+
+
+def main():
+    import argparse
+    from Bingo_P import RegistroIds, iterar_cartones_desde_archivo
+
+    parser = argparse.ArgumentParser(description="Reproduce partidas grabadas sin interacción")
+    parser.add_argument("cartones", help="archivo .txt, .csv o .bngp con los cartones de la partida")
+    parser.add_argument("grabaciones", nargs="+", help="archivos .bngr")
+    parser.add_argument("--motor", default="indice")
+    args = parser.parse_args()
+
+    cartones = list(iterar_cartones_desde_archivo(args.cartones, RegistroIds()))
+    reproductor = Reproductor(cartones, args.motor)
+
+    distintas = 0
+    for ruta in args.grabaciones:
+        try:
+            resultado = reproductor.reproducir(leer_grabacion(ruta)).a_dict()
+        except (OSError, ValueError, KeyError) as e:
+            resultado = {"error": str(e)}
+        distintas += not resultado.get("coincide", False)
+        print(json.dumps({"archivo": ruta, **resultado}, ensure_ascii=False))
+    if distintas:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
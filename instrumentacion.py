@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Instrumentación opcional del camino crítico: tiempos por etapa, contadores
+# (cartones tocados por extracción, marcas aplicadas, ganadores), pico de
+# memoria y captura opcional con cProfile/tracemalloc.
+#
+# Mientras no se active no cuesta nada: activar() reemplaza las funciones
+# medidas por envoltorios y desactivar() deja las originales, así que el
+# código normal nunca pasa por un "if instrumentado".
+#
+# Activación desde la consola: BINGO_INSTRUMENTACION=1 (o "perfil,memoria")
+# y, opcionalmente, BINGO_METRICAS_PUERTO=9100 para exponer /metrics.
+
+import functools
+import importlib
+import inspect
+import time
+from collections import Counter
+
+ACTIVA = False
+_tiempos = {}
+_contadores = Counter()
+_parches = []
+_perfil = None
+_memoria = False
+
+# Clase de los motores de Bingo_P.MOTORES que se crean con una función (para
+# importar su módulo solo si se eligen); RondaIndice está en MOTORES tal cual
+CLASES_MOTOR = {
+    "bits": ("cartones_compactos", "MotorBits"),
+    "numpy": ("motor_numpy", "MotorNumpy"),
+    "fragmentado": ("motor_fragmentado", "MotorFragmentado"),
+}
+
+
+class _Etapa:
+    __slots__ = ("llamadas", "total", "maximo")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def sumar(self, segundos):
+        self.llamadas += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+
+def registrar_tiempo(etapa, segundos):
+    e = _tiempos.get(etapa)
+    if e is None:
+        e = _tiempos[etapa] = _Etapa()
+    e.sumar(segundos)
+
+
+def contar(nombre, n=1):
+    _contadores[nombre] += n
+
+
+def _envolver(etapa, funcion, antes=None, despues=None):
+    # antes(args) -> contexto; despues(contexto, resultado) para los contadores
+    if inspect.isgeneratorfunction(funcion):
+        @functools.wraps(funcion)
+        def envoltorio_gen(*args, **kwargs):
+            # En los generadores se mide el tiempo real de lectura (cada next)
+            gen = funcion(*args, **kwargs)
+            total = 0.0
+            n = 0
+            try:
+                while True:
+                    t0 = time.perf_counter()
+                    try:
+                        item = next(gen)
+                    except StopIteration:
+                        break
+                    finally:
+                        total += time.perf_counter() - t0
+                    n += 1
+                    yield item
+            finally:
+                registrar_tiempo(etapa, total)
+                contar(f"{etapa}.elementos", n)
+        return envoltorio_gen
+
+    @functools.wraps(funcion)
+    def envoltorio(*args, **kwargs):
+        contexto = antes(*args) if antes else None
+        t0 = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        registrar_tiempo(etapa, time.perf_counter() - t0)
+        if despues:
+            despues(contexto, resultado)
+        return resultado
+    return envoltorio
+
+
+def _parchear(objetivo, nombre, etapa, antes=None, despues=None):
+    original = objetivo.__dict__[nombre]
+    setattr(objetivo, nombre, _envolver(etapa, original, antes, despues))
+    _parches.append((objetivo, nombre, original))
+
+
+def _antes_marcar(ronda, palabra):
+    # Cartones que recibirán una marca nueva con esta palabra (solo con la instrumentación activa)
+    from Bingo_P import normalizar
+    w = normalizar(palabra)
+    candidatos = ronda.indice.get(w, [])
+    return len(candidatos), sum(1 for c in candidatos if w not in c.marked)
+
+
+def _despues_marcar(contexto, ganadores):
+    tocados, marcas = contexto
+    contar("extracciones")
+    contar("cartones_tocados", tocados)
+    contar("marcas_aplicadas", marcas)
+    contar("ganadores_comprobados", marcas)
+    contar("ganadores", len(ganadores))
+    registrar_tiempo("cartones_tocados_por_extraccion", tocados)
+
+
+def _despues_greedy(contexto, ganadores):
+    contar("extracciones")
+    contar("ganadores", len(ganadores))
+
+
+def _clase_motor(nombre, motor):
+    if isinstance(motor, type):
+        return motor
+    if nombre not in CLASES_MOTOR:
+        return None
+    modulo, clase = CLASES_MOTOR[nombre]
+    try:
+        return getattr(importlib.import_module(modulo), clase)
+    except ImportError:
+        return None
+
+
+def activar(perfil=False, memoria=False, modulo=None, clase_bingo=None):
+    # modulo: el módulo Bingo_P a medir (hay que pasarlo cuando se ejecuta como
+    # script, porque entonces es __main__ y no el Bingo_P importable).
+    # clase_bingo: la clase BingoP de "bingo (1).py" si también se quiere medir.
+    global ACTIVA, _perfil, _memoria
+    if ACTIVA:
+        return
+    if modulo is None:
+        import Bingo_P as modulo
+    Bingo_P = modulo
+    for nombre in ("cargar_cartones_desde_txt", "cargar_cartones_desde_csv",
+                   "cargar_cartones_desde_csv_rapido",
+                   "iterar_cartones_desde_txt", "iterar_cartones_desde_csv",
+                   "iterar_cartones_desde_csv_rapido",
+                   "agrupar_por_id", "construir_indice"):
+        _parchear(Bingo_P, nombre, nombre)
+    _parchear(Bingo_P, "greedy_mark_and_check", "greedy_mark_and_check", despues=_despues_greedy)
+    # El marcado de cada motor de MOTORES; los cartones tocados solo se
+    # pueden contar en RondaIndice, que marca sobre los propios Carton
+    for nombre, motor in Bingo_P.MOTORES.items():
+        clase = _clase_motor(nombre, motor)
+        if clase is None or any(o is clase and n == "marcar" for o, n, _ in _parches):
+            continue
+        if clase is Bingo_P.RondaIndice:
+            _parchear(clase, "marcar", "RondaIndice.marcar", _antes_marcar, _despues_marcar)
+        else:
+            _parchear(clase, "marcar", f"{clase.__name__}.marcar", despues=_despues_greedy)
+    if clase_bingo is not None:
+        # procesar_palabra incluye la salida por consola; _marcar_palabra es solo el marcado
+        _parchear(clase_bingo, "procesar_palabra", "BingoP.procesar_palabra")
+        # Los contadores los aporta el motor de BingoP (ya instrumentado arriba)
+        _parchear(clase_bingo, "_marcar_palabra", "BingoP._marcar_palabra")
+    if memoria:
+        import tracemalloc
+        tracemalloc.start()
+        _memoria = True
+    if perfil:
+        import cProfile
+        _perfil = cProfile.Profile()
+        _perfil.enable()
+    ACTIVA = True
+
+
+def desactivar():
+    global ACTIVA, _memoria
+    while _parches:
+        objetivo, nombre, original = _parches.pop()
+        setattr(objetivo, nombre, original)
+    if _perfil is not None:
+        _perfil.disable()
+    if _memoria:
+        import tracemalloc
+        # El pico de tracemalloc se conserva en los contadores al desactivar
+        _contadores["memoria_pico_bytes"] = max(_contadores["memoria_pico_bytes"],
+                                                tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        _memoria = False
+    ACTIVA = False
+
+
+def reiniciar():
+    _tiempos.clear()
+    _contadores.clear()
+
+
+def _memoria_proceso_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def volcado():
+    datos = {
+        "etapas": {etapa: {"llamadas": e.llamadas, "segundos": round(e.total, 6),
+                           "max_segundos": round(e.maximo, 6)}
+                   for etapa, e in _tiempos.items() if etapa != "cartones_tocados_por_extraccion"},
+        "contadores": dict(_contadores),
+        "memoria_proceso_max_kb": _memoria_proceso_kb(),
+    }
+    tocados = _tiempos.get("cartones_tocados_por_extraccion")
+    if tocados is not None and tocados.llamadas:
+        datos["cartones_tocados_por_extraccion"] = {"media": tocados.total / tocados.llamadas,
+                                                    "max": tocados.maximo}
+    if _memoria:
+        import tracemalloc
+        actual, pico = tracemalloc.get_traced_memory()
+        datos["memoria_traza"] = {"actual_bytes": actual, "pico_bytes": pico}
+    return datos
+
+
+def texto_prometheus():
+    lineas = ["# TYPE bingo_etapa_segundos_total counter",
+              "# TYPE bingo_etapa_llamadas_total counter"]
+    for etapa, e in sorted(_tiempos.items()):
+        lineas.append(f'bingo_etapa_segundos_total{{etapa="{etapa}"}} {e.total:.6f}')
+        lineas.append(f'bingo_etapa_llamadas_total{{etapa="{etapa}"}} {e.llamadas}')
+        lineas.append(f'bingo_etapa_max_segundos{{etapa="{etapa}"}} {e.maximo:.6f}')
+    for nombre, n in sorted(_contadores.items()):
+        lineas.append(f"bingo_{nombre.replace('.', '_')}_total {n}")
+    rss = _memoria_proceso_kb()
+    if rss is not None:
+        lineas.append(f"bingo_memoria_proceso_max_kb {rss}")
+    return "\n".join(lineas) + "\n"
+
+
+def resumen_perfil(n=25):
+    if _perfil is None:
+        return ""
+    import io
+    import pstats
+    salida = io.StringIO()
+    pstats.Stats(_perfil, stream=salida).sort_stats("cumulative").print_stats(n)
+    return salida.getvalue()
+
+
+def servir_metricas(puerto=9100, host="127.0.0.1"):
+    # Endpoint /metrics en un hilo aparte, en formato de texto de Prometheus
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            cuerpo = texto_prometheus().encode('utf-8')
+            self.send_response(200 if self.path == "/metrics" else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def activar_desde_entorno(modulo=None, clase_bingo=None):
+    # BINGO_INSTRUMENTACION=1 | perfil | memoria | perfil,memoria
+    import os
+    valor = os.environ.get("BINGO_INSTRUMENTACION", "").strip().lower()
+    if not valor or valor in ("0", "no", "false"):
+        return False
+    opciones = {v.strip() for v in valor.split(",")}
+    activar(perfil="perfil" in opciones, memoria="memoria" in opciones, modulo=modulo, clase_bingo=clase_bingo)
+    puerto = os.environ.get("BINGO_METRICAS_PUERTO")
+    if puerto:
+        servir_metricas(int(puerto))
+    return True
+
+
+def imprimir_volcado():
+    import json
+    print(json.dumps(volcado(), ensure_ascii=False, indent=2))
+    perfil = resumen_perfil()
+    if perfil:
+        print(perfil)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Motor fragmentado para salas muy grandes: los cartones de un idioma se
+# reparten en tramos contiguos entre varios procesos, cada uno con su propio
+# índice invertido. Las palabras pendientes de cada cartón viven en memoria
+# compartida (un byte por cartón), así que por cada extracción solo viaja a
+# cada proceso el número de la palabra y de vuelta las filas que se completan.
+#
+# Como los tramos respetan el orden de carga y las respuestas se unen en el
+# orden de los tramos, los ganadores salen en el mismo orden que con
+# greedy_mark_and_check y el resto de MOTORES. Con un solo tramo (rondas
+# pequeñas) no se arranca ningún proceso: el índice se usa en el propio.
+
+import multiprocessing
+import os
+import weakref
+from array import array
+from collections import Counter
+from multiprocessing import shared_memory
+
+from Bingo_P import NORMALIZADOR, filas_mas_cercanas
+
+
+def _indexar(palabras_por_carton, inicio=0):
+    # Número de palabra -> filas (globales) de los cartones que la contienen
+    indice = {}
+    for i, ids in enumerate(palabras_por_carton, inicio):
+        for j in ids:
+            filas = indice.get(j)
+            if filas is None:
+                filas = indice[j] = array('I')
+            filas.append(i)
+    return indice
+
+
+def _marcar(indice, pendientes, j):
+    # Resta la palabra j a sus cartones y devuelve las filas que llegan a 0
+    ganadores = []
+    for i in indice.get(j, ()):
+        p = pendientes[i] - 1
+        pendientes[i] = p
+        if p == 0:
+            ganadores.append(i)
+    return ganadores
+
+
+def _trabajador(conexion, nombre_memoria, inicio, palabras_por_carton):
+    # Proceso de un tramo: recibe números de palabra y devuelve las filas
+    # (globales) de los cartones que esa palabra completa. None termina.
+    indice = _indexar(palabras_por_carton, inicio)
+    del palabras_por_carton
+    memoria = shared_memory.SharedMemory(name=nombre_memoria)
+    pendientes = memoria.buf
+    try:
+        while True:
+            j = conexion.recv()
+            if j is None:
+                break
+            conexion.send(_marcar(indice, pendientes, j))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del pendientes
+        memoria.close()
+
+
+class _Recursos:
+    # Procesos, tuberías y memoria compartida de un motor; se liberan con
+    # cerrar() o automáticamente cuando el motor deja de usarse
+    def __init__(self, memoria):
+        self.memoria = memoria
+        self.vista = memoria.buf[:0]
+        self.procesos = []
+        self.conexiones = []
+
+    def cerrar(self):
+        for conexion in self.conexiones:
+            try:
+                conexion.send(None)
+                conexion.close()
+            except (OSError, BrokenPipeError):
+                pass
+        for proceso in self.procesos:
+            proceso.join(timeout=1)
+            if proceso.is_alive():
+                proceso.terminate()
+        self.conexiones, self.procesos = [], []
+        self.vista.release()
+        self.memoria.close()
+        self.memoria.unlink()
+
+
+class MotorFragmentado:
+    # Misma interfaz que RondaIndice, MotorBits y MotorNumpy (ver MOTORES en Bingo_P)
+    def __init__(self, cartones_lista, fragmentos=None, minimo_por_fragmento=50_000):
+        self.cartones = list(cartones_lista)
+        self.filas = {c.id: i for i, c in enumerate(self.cartones)}
+        self.lang = self.cartones[0].lang if self.cartones else None
+        # Cada palabra viaja a los procesos como su ID en el Normalizador
+        palabras_por_carton = []
+        for c in self.cartones:
+            palabras_por_carton.append(array('I', (NORMALIZADOR.id_de(self.lang, w) for w in c.words)))
+        self.conteos = Counter(j for ids in palabras_por_carton for j in ids)
+        self.totales = bytes(len(ids) for ids in palabras_por_carton)
+        self.num_ids = NORMALIZADOR.num_ids(self.lang)
+        self.sorteadas = bytearray(self.num_ids)
+
+        n = len(self.cartones)
+        if fragmentos is None:
+            fragmentos = min(os.cpu_count() or 1, n // minimo_por_fragmento)
+        fragmentos = max(1, min(fragmentos, n))
+
+        if fragmentos == 1:
+            # Sin procesos ni memoria compartida: arrancar un proceso y pasar
+            # cada palabra por una tubería cuesta más que marcar aquí
+            self._indice = _indexar(palabras_por_carton)
+            self.pendientes = bytearray(self.totales)
+            self._recursos = self._finalizador = None
+            return
+
+        self._indice = None
+        recursos = _Recursos(shared_memory.SharedMemory(create=True, size=max(n, 1)))
+        self._recursos = recursos
+        self._finalizador = weakref.finalize(self, recursos.cerrar)
+        recursos.vista = self.pendientes = recursos.memoria.buf[:n]
+        self.pendientes[:] = self.totales
+
+        contexto = multiprocessing.get_context()
+        tamaño = -(-n // fragmentos) if n else 0
+        for inicio in range(0, n, tamaño or 1):
+            propia, remota = contexto.Pipe()
+            proceso = contexto.Process(
+                target=_trabajador, daemon=True,
+                args=(remota, recursos.memoria.name, inicio, palabras_por_carton[inicio:inicio + tamaño]))
+            proceso.start()
+            remota.close()
+            recursos.procesos.append(proceso)
+            recursos.conexiones.append(propia)
+
+    def _id(self, palabra: str):
+        # None también para IDs asignados después de construir el motor
+        j = NORMALIZADOR.buscar_id(self.lang, palabra)
+        return None if j is None or j >= self.num_ids else j
+
+    def marcar(self, palabra: str):
+        j = self._id(palabra)
+        if j is None or self.sorteadas[j]:
+            return []
+        self.sorteadas[j] = 1
+        if self._indice is not None:
+            return [self.cartones[i] for i in _marcar(self._indice, self.pendientes, j)]
+        conexiones = self._recursos.conexiones
+        # Primero se reparte la palabra a todos los tramos y luego se recogen
+        # las respuestas, para que trabajen en paralelo
+        for conexion in conexiones:
+            conexion.send(j)
+        ganadores = []
+        for conexion in conexiones:
+            ganadores.extend(conexion.recv())
+        return [self.cartones[i] for i in ganadores]
+
+    def beneficiados(self, palabra: str) -> int:
+        j = self._id(palabra)
+        return 0 if j is None else self.conteos[j]
+
+    def ganadores(self):
+        pendientes = self.pendientes
+        return [c for i, c in enumerate(self.cartones) if pendientes[i] == 0]
+
+    def faltan(self, carton) -> int:
+        return self.pendientes[self.filas[carton.id]]
+
+    def mas_cercanos(self, k=10):
+        # Los contadores los actualizan los procesos en la memoria compartida,
+        # así que aquí no hay cubetas: recorrido O(n) a velocidad de memchr
+        pendientes = self.pendientes
+        return [(self.cartones[i], pendientes[i]) for i in filas_mas_cercanas(pendientes, k)]
+
+    def distribucion(self):
+        return dict(sorted(Counter(bytes(self.pendientes)).items()))
+
+    def reiniciar(self):
+        self.pendientes[:] = self.totales
+        self.sorteadas = bytearray(self.num_ids)
+
+    def cerrar(self):
+        if self._finalizador is not None:
+            self._finalizador()
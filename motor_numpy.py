@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Motor vectorizado para rondas muy grandes: todos los cartones de un idioma
+# se guardan en una matriz cartones x vocabulario. Cada palabra extraída
+# marca una columna completa y los ganadores salen de una sola reducción,
+# sin bucles de Python por cartón.
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional
+    np = None
+
+from Bingo_P import NORMALIZADOR
+
+
+class MotorNumpy:
+    def __init__(self, cartones_lista):
+        if np is None:
+            raise RuntimeError("El motor 'numpy' requiere numpy instalado (pip install numpy).")
+        self.cartones = list(cartones_lista)
+        self.filas = {c.id: i for i, c in enumerate(self.cartones)}
+        self.lang = self.cartones[0].lang if self.cartones else None
+        # La columna de cada palabra es su ID en el Normalizador
+        filas, columnas = [], []
+        for i, c in enumerate(self.cartones):
+            for w in c.words:
+                filas.append(i)
+                columnas.append(NORMALIZADOR.id_de(self.lang, w))
+        # Orden Fortran: cada columna (una palabra) queda contigua en memoria
+        self.matriz = np.zeros((len(self.cartones), NORMALIZADOR.num_ids(self.lang)), dtype=bool, order='F')
+        self.matriz[filas, columnas] = True
+        self._preparar()
+
+    @classmethod
+    def desde_seccion(cls, seccion):
+        # Construye el motor directamente sobre una sección de un ArchivoCartones
+        # (.bngp): los índices se leen del mmap sin crear objetos Carton, que solo
+        # se materializan cuando hay que devolver ganadores.
+        if np is None:
+            raise RuntimeError("El motor 'numpy' requiere numpy instalado (pip install numpy).")
+        motor = cls.__new__(cls)
+        motor.cartones = seccion
+        motor.filas = None
+        motor.lang = seccion.lang
+        # Columna de cada palabra del archivo; dos palabras que se normalizan
+        # igual comparten ID y columna, como al construir desde Cartones
+        columna_de = np.array([NORMALIZADOR.id_de(motor.lang, w) for w in seccion.normalizadas], dtype=np.intp)
+        indices = np.frombuffer(seccion.palabras, dtype=np.uint16).reshape(len(seccion), seccion.maximo)
+        filas, columnas = np.nonzero(indices != 0xFFFF)
+        motor.matriz = np.zeros((len(seccion), NORMALIZADOR.num_ids(motor.lang)), dtype=bool, order='F')
+        motor.matriz[filas, columna_de[indices[filas, columnas]]] = True
+        motor._preparar()
+        return motor
+
+    def _preparar(self):
+        self.totales = self.matriz.sum(axis=1, dtype=np.uint8)
+        self.conteos = self.matriz.sum(axis=0)
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.pendientes = self.totales.copy()
+        self.sorteadas = np.zeros(self.matriz.shape[1], dtype=bool)
+
+    def _columna(self, palabra: str):
+        # Los IDs se comparten entre motores del mismo idioma: uno asignado
+        # después de construir este motor no tiene columna aquí
+        j = NORMALIZADOR.buscar_id(self.lang, palabra)
+        return None if j is None or j >= self.matriz.shape[1] else j
+
+    def marcar(self, palabra: str):
+        j = self._columna(palabra)
+        if j is None or self.sorteadas[j]:
+            return []
+        self.sorteadas[j] = True
+        columna = self.matriz[:, j]
+        self.pendientes -= columna
+        # Solo los cartones que tenían la palabra pueden completarse ahora
+        return [self.cartones[i] for i in np.flatnonzero(columna & (self.pendientes == 0))]
+
+    def beneficiados(self, palabra: str) -> int:
+        j = self._columna(palabra)
+        return 0 if j is None else int(self.conteos[j])
+
+    def ganadores(self):
+        return [self.cartones[i] for i in np.flatnonzero(self.pendientes == 0)]
+
+    def mas_cercanos(self, k=10):
+        # Selección parcial vectorizada de los k cartones con menos pendientes,
+        # en orden de carga dentro de cada nivel
+        k = min(k, len(self.pendientes))
+        if k == 0:
+            return []
+        filas = np.argpartition(self.pendientes, k - 1)[:k]
+        filas = filas[np.lexsort((filas, self.pendientes[filas]))]
+        return [(self.cartones[i], int(self.pendientes[i])) for i in filas]
+
+    def distribucion(self):
+        conteo = np.bincount(self.pendientes)
+        return {faltan: int(n) for faltan, n in enumerate(conteo) if n}
+
+    def faltan(self, carton) -> int:
+        if self.filas is None:
+            self.filas = {self.cartones.id_de(i): i for i in range(len(self.cartones))}
+        return int(self.pendientes[self.filas[carton.id]])
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Oráculo de ganadores para eventos auditados con orden de extracción fijo.
+# En vez de simular extracción por extracción, para cada cartón se calcula en
+# qué extracción se completa: la mayor posición (primera aparición) de sus
+# palabras dentro de la secuencia de su ronda. El mínimo de esa cifra entre los
+# cartones de la ronda es la extracción ganadora. Coste O(total de palabras).
+#
+# El resultado coincide con jugar(): las rondas se recorren en el orden dado,
+# las rondas sin cartones se omiten sin consumir extracciones y la partida
+# termina en la primera ronda con ganadores.
+#
+# Uso:
+#   python oraculo.py cartones.txt --orden SP,EN,DT,PT --extracciones sorteo.txt
+#   python oraculo.py --diario partidas/evento1      (verifica una partida registrada)
+# En sorteo.txt van las palabras de cada ronda con cartones, separadas por líneas 'END'.
+
+import json
+from collections import defaultdict
+
+from Bingo_P import LANG_MAX_WORDS, fichas_extracciones, normalizar
+
+
+class ResultadoRonda:
+    def __init__(self, idioma, extraccion, ganadores, extracciones):
+        self.idioma = idioma
+        # nº de extracción (desde 1) en que aparece el primer ganador, o None
+        self.extraccion = extraccion
+        self.ganadores = ganadores
+        self.extracciones = extracciones
+
+    def a_dict(self):
+        return {"idioma": self.idioma, "extraccion": self.extraccion,
+                "ganadores": [c.id for c in self.ganadores], "extracciones": self.extracciones}
+
+
+def completar_ronda(cartones_ronda, palabras):
+    # Devuelve (extracción ganadora, ganadores en orden de carga) para una ronda
+    posicion = {}
+    for i, p in enumerate(palabras, 1):
+        # Una palabra repetida no vuelve a marcar: cuenta su primera aparición
+        posicion.setdefault(normalizar(p), i)
+    mejor = None
+    ganadores = []
+    for c in cartones_ronda:
+        fin = 0
+        for w in c.words:
+            i = posicion.get(w)
+            if i is None:
+                break
+            if i > fin:
+                fin = i
+        else:
+            if mejor is None or fin < mejor:
+                mejor, ganadores = fin, [c]
+            elif fin == mejor:
+                ganadores.append(c)
+    return mejor, ganadores
+
+
+def oraculo(cartones, orden, extracciones_por_ronda):
+    # extracciones_por_ronda: idioma -> palabras extraídas en esa ronda, en orden.
+    # Devuelve (resultado de la partida o None, resultados de todas las rondas con cartones)
+    por_idioma = defaultdict(list)
+    for c in cartones:
+        por_idioma[c.lang].append(c)
+    rondas = []
+    for idioma in orden:
+        if not por_idioma.get(idioma):
+            continue
+        palabras = extracciones_por_ronda.get(idioma, [])
+        extraccion, ganadores = completar_ronda(por_idioma[idioma], palabras)
+        rondas.append(ResultadoRonda(idioma, extraccion, ganadores, len(palabras)))
+    partida = next((r for r in rondas if r.ganadores), None)
+    return partida, rondas
+
+
+def leer_rondas(archivo, orden, idiomas_con_cartones):
+    # Reparte las palabras del archivo (rondas separadas por 'END') entre las
+    # rondas que jugar() realmente juega, es decir, las que tienen cartones
+    rondas = [[]]
+    for palabra in fichas_extracciones(archivo):
+        if palabra is None:
+            rondas.append([])
+        else:
+            rondas[-1].append(palabra)
+    jugadas = [i for i in orden if i in idiomas_con_cartones]
+    return {idioma: palabras for idioma, palabras in zip(jugadas, rondas)}
+
+
+def main():
+    import argparse
+    from Bingo_P import RegistroIds, iterar_cartones_desde_archivo
+
+    parser = argparse.ArgumentParser(description="Calcula los ganadores de una partida con orden de extracción fijo")
+    parser.add_argument("archivos", nargs="*", help="archivos .txt, .csv o .bngp de cartones")
+    parser.add_argument("--orden", help="orden de rondas, p. ej. SP,EN,DT,PT")
+    parser.add_argument("--extracciones", help="archivo con las palabras de cada ronda separadas por 'END'")
+    parser.add_argument("--diario", help="ruta base de un diario de recuperación (diario.py)")
+    args = parser.parse_args()
+
+    if args.diario:
+        from diario import recuperar
+        estado = recuperar(args.diario)
+        cartones, orden, extracciones = estado.cartones, estado.orden, estado.extracciones
+    else:
+        if not (args.archivos and args.orden and args.extracciones):
+            parser.error("indica los archivos de cartones, --orden y --extracciones (o --diario)")
+        orden = [i.strip().upper() for i in args.orden.split(",")]
+        if sorted(orden) != sorted(LANG_MAX_WORDS):
+            parser.error(f"--orden debe contener exactamente {', '.join(LANG_MAX_WORDS)}")
+        vistos = RegistroIds()
+        cartones = []
+        for path in args.archivos:
+            cartones.extend(iterar_cartones_desde_archivo(path, vistos))
+        with open(args.extracciones, 'r', encoding='utf-8') as f:
+            extracciones = leer_rondas(f, orden, {c.lang for c in cartones})
+
+    partida, rondas = oraculo(cartones, orden, extracciones)
+    print(json.dumps({"orden": orden,
+                      "ganadora": partida.a_dict() if partida else None,
+                      "rondas": [r.a_dict() for r in rondas]}, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Servidor asyncio que aloja muchas partidas (salas) a la vez en un solo
+# proceso. Cada partida tiene sus propios cartones y su orden de rondas, igual
+# que jugar(), recibe extracciones y avisa a los suscriptores cuando hay
+# ganadores, para que index.html/script.js y las consolas de los operadores
+# compartan la misma lógica de marcado.
+#
+# Protocolo: un objeto JSON por línea con el campo "accion". Por ejemplo:
+#   {"accion": "crear", "partida": "sala1", "archivo": "cartones.txt", "semilla": 7}   (solo con --cartones-dir)
+#   {"accion": "crear", "partida": "sala2", "cartones": [["SP000001", ["casa", "sol"]]]}
+#   {"accion": "suscribir", "partida": "sala1"}
+#   {"accion": "extraer", "partida": "sala1", "palabra": "casa"}
+#   {"accion": "fin_ronda", "partida": "sala1"}        (equivale a END)
+#   {"accion": "estado", "partida": "sala1"} / {"accion": "listar"} / {"accion": "cerrar", "partida": "sala1"}
+# Cada petición recibe una respuesta {"ok": true, ...} o {"ok": false, "error": ...};
+# los avisos a suscriptores ("ronda", "fin") llevan el campo "evento" y pueden
+# llegar por la misma conexión intercalados con las respuestas.
+# El mismo puerto acepta también POST HTTP con el JSON en el cuerpo; solo se
+# atienden peticiones de navegador desde los orígenes dados con --origen.
+# "archivo" solo se acepta dentro del directorio dado con --cartones-dir.
+# Cargar cartones y marcar se hacen en hilos aparte (run_in_executor) para no
+# frenar al resto de salas; las extracciones de una misma sala van en serie.
+#
+# Uso: python servidor.py --puerto 8765 [--cartones-dir cartones/] [--origen http://localhost:8000]
+#      python servidor.py --unix /tmp/bingo.sock
+
+import asyncio
+import json
+import os
+import random
+from collections import defaultdict
+
+from Bingo_P import LANG_MAX_WORDS, MOTORES, Carton, RegistroIds, iterar_cartones_desde_archivo
+
+
+class ErrorPeticion(Exception):
+    pass
+
+
+class Partida:
+    def __init__(self, nombre, cartones, semilla=None, motor="indice"):
+        if motor not in MOTORES:
+            raise ErrorPeticion(f"Motor desconocido: {motor}")
+        self.nombre = nombre
+        self.cartones = cartones
+        lang_to_cartones = defaultdict(list)
+        for c in cartones:
+            lang_to_cartones[c.lang].append(c)
+        self.rondas = {lang: MOTORES[motor](lista) for lang, lista in lang_to_cartones.items()}
+        self.orden = list(LANG_MAX_WORDS.keys())
+        random.Random(semilla).shuffle(self.orden)
+        self.posicion = -1
+        self.extracciones = 0
+        self.ganadores = []
+        self.terminada = False
+        self.suscriptores = set()
+        # Bucle de eventos de las colas de suscriptores: los avisos pueden
+        # salir desde un hilo del executor
+        self.bucle = None
+        self.bloqueo = asyncio.Lock()
+
+    @property
+    def ronda_actual(self):
+        return self.orden[self.posicion] if 0 <= self.posicion < len(self.orden) else None
+
+    def _avisar(self, tipo, datos):
+        # Los avisos llevan el campo "evento"; la respuesta a la petición no
+        evento = {"evento": tipo, "partida": self.nombre, **datos}
+        for cola in list(self.suscriptores):
+            if self.bucle is not None:
+                self.bucle.call_soon_threadsafe(cola.put_nowait, evento)
+            else:
+                cola.put_nowait(evento)
+        return datos
+
+    def _terminar(self, ganadores, motivo):
+        self.terminada = True
+        self.ganadores = [c.id for c in ganadores]
+        return self._avisar("fin", {"ronda": self.ronda_actual, "ganadores": self.ganadores,
+                                    "motivo": motivo, "terminada": True})
+
+    def avanzar_ronda(self):
+        # Pasa a la siguiente ronda con cartones; las vacías se omiten como en jugar()
+        self.posicion += 1
+        while self.posicion < len(self.orden) and self.ronda_actual not in self.rondas:
+            self.posicion += 1
+        if self.posicion >= len(self.orden):
+            return self._terminar([], "rondas completadas")
+        self.extracciones = 0
+        return self._avisar("ronda", {"ronda": self.ronda_actual,
+                                      "cartones": len(self.rondas[self.ronda_actual].cartones)})
+
+    def extraer(self, palabra):
+        if self.terminada:
+            raise ErrorPeticion("La partida ya terminó")
+        ronda = self.rondas[self.ronda_actual]
+        self.extracciones += 1
+        ganadores = ronda.marcar(palabra)
+        if ganadores:
+            return self._terminar(ganadores, "ganador")
+        return {"ronda": self.ronda_actual, "extraccion": self.extracciones,
+                "beneficiados": ronda.beneficiados(palabra), "terminada": False}
+
+    def fin_ronda(self):
+        if self.terminada:
+            raise ErrorPeticion("La partida ya terminó")
+        ganadores = self.rondas[self.ronda_actual].ganadores()
+        if ganadores:
+            return self._terminar(ganadores, "ganador (evaluación END)")
+        return self.avanzar_ronda()
+
+    def estado(self):
+        return {"partida": self.nombre, "orden": self.orden, "ronda": self.ronda_actual,
+                "extracciones": self.extracciones, "cartones": len(self.cartones),
+                "terminada": self.terminada, "ganadores": self.ganadores,
+                "suscriptores": len(self.suscriptores)}
+
+
+class ServidorBingo:
+    EXTENSIONES = ('.txt', '.csv', '.bngp')
+
+    def __init__(self, directorio_cartones=None, origenes=()):
+        self.partidas = {}
+        self.creando = set()
+        # Sin directorio no se cargan archivos del servidor, solo cartones en línea
+        self.directorio = os.path.realpath(directorio_cartones) if directorio_cartones else None
+        self.origenes = set(origenes)
+
+    def _partida(self, peticion):
+        nombre = peticion.get("partida")
+        if nombre not in self.partidas:
+            raise ErrorPeticion(f"No existe la partida: {nombre}")
+        return self.partidas[nombre]
+
+    def _ruta_permitida(self, archivo):
+        if self.directorio is None:
+            raise ErrorPeticion("La carga por archivo está deshabilitada (inicie el servidor con --cartones-dir)")
+        ruta = os.path.realpath(os.path.join(self.directorio, str(archivo)))
+        if os.path.commonpath([self.directorio, ruta]) != self.directorio or not ruta.lower().endswith(self.EXTENSIONES):
+            raise ErrorPeticion(f"Archivo no permitido: {archivo}")
+        if not os.path.isfile(ruta):
+            raise ErrorPeticion(f"No existe el archivo: {archivo}")
+        return ruta
+
+    def _cargar_cartones(self, peticion):
+        vistos = RegistroIds()
+        cartones = []
+        errores = []
+        if "archivo" in peticion:
+            ruta = self._ruta_permitida(peticion["archivo"])
+            cartones.extend(iterar_cartones_desde_archivo(ruta, vistos, errores.append))
+        en_linea = peticion.get("cartones", [])
+        if not isinstance(en_linea, list):
+            raise ErrorPeticion('"cartones" debe ser una lista de [id, [palabras...]]')
+        for entrada in en_linea:
+            if not (isinstance(entrada, list) and len(entrada) == 2 and isinstance(entrada[0], str)
+                    and isinstance(entrada[1], list) and all(isinstance(p, str) for p in entrada[1])):
+                raise ErrorPeticion(f'Cartón inválido en "cartones" (se espera [id, [palabras...]]): {entrada!r:.80}')
+            id_str, palabras = entrada
+            try:
+                c = Carton(id_str, palabras)
+            except ValueError as e:
+                errores.append(str(e))
+                continue
+            if vistos.agregar(c.id, "peticion"):
+                cartones.append(c)
+        if not cartones:
+            raise ErrorPeticion("La partida no tiene cartones válidos" + (f": {errores[:5]}" if errores else ""))
+        return cartones, errores, vistos.duplicados
+
+    ACCIONES = {"crear", "listar", "suscribir", "extraer", "fin_ronda", "estado", "cerrar"}
+
+    def _preparar_partida(self, peticion):
+        # Parte lenta de "crear" (carga y construcción de motores); va en el executor
+        cartones, errores, duplicados = self._cargar_cartones(peticion)
+        partida = Partida(peticion["partida"], cartones, peticion.get("semilla"), peticion.get("motor", "indice"))
+        return partida, errores, duplicados
+
+    def _registrar(self, partida, errores, duplicados, bucle=None):
+        partida.bucle = bucle
+        self.partidas[partida.nombre] = partida
+        primera = partida.avanzar_ronda()
+        return {"partida": partida.nombre, "orden": partida.orden, "cartones": len(partida.cartones),
+                "errores": errores[:20], "total_errores": len(errores),
+                "duplicados": duplicados, "ronda": primera.get("ronda")}
+
+    def _validar_nombre(self, peticion):
+        nombre = peticion.get("partida")
+        if not nombre or nombre in self.partidas or nombre in self.creando:
+            raise ErrorPeticion(f"Nombre de partida inválido o en uso: {nombre}")
+
+    def atender(self, peticion, cola=None):
+        # Versión síncrona (sin executor), útil para pruebas y scripts
+        accion = peticion.get("accion")
+        if accion not in self.ACCIONES:
+            raise ErrorPeticion(f"Acción desconocida: {accion}")
+        if accion == "crear":
+            self._validar_nombre(peticion)
+            return self._registrar(*self._preparar_partida(peticion))
+        if accion == "listar":
+            return {"partidas": [p.estado() for p in self.partidas.values()]}
+        partida = self._partida(peticion)
+        if accion == "suscribir":
+            if cola is None:
+                raise ErrorPeticion("Las suscripciones requieren una conexión abierta (JSON por líneas)")
+            partida.suscriptores.add(cola)
+            return partida.estado()
+        if accion == "extraer":
+            palabra = str(peticion.get("palabra", "")).strip()
+            if not palabra:
+                raise ErrorPeticion("Falta la palabra")
+            return partida.extraer(palabra)
+        if accion == "fin_ronda":
+            return partida.fin_ronda()
+        if accion == "estado":
+            return partida.estado()
+        if accion == "cerrar":
+            del self.partidas[partida.nombre]
+            return {"partida": partida.nombre, "cerrada": True}
+
+    async def atender_async(self, peticion, cola=None):
+        # Lo que puede tardar (cargar, marcar) sale del bucle de eventos
+        bucle = asyncio.get_running_loop()
+        accion = peticion.get("accion")
+        if accion == "crear":
+            self._validar_nombre(peticion)
+            nombre = peticion["partida"]
+            self.creando.add(nombre)
+            try:
+                partida, errores, duplicados = await bucle.run_in_executor(None, self._preparar_partida, peticion)
+            finally:
+                self.creando.discard(nombre)
+            return self._registrar(partida, errores, duplicados, bucle)
+        if accion in ("extraer", "fin_ronda"):
+            partida = self._partida(peticion)
+            async with partida.bloqueo:
+                return await bucle.run_in_executor(None, self.atender, peticion, cola)
+        return self.atender(peticion, cola)
+
+    async def responder(self, linea, cola=None):
+        try:
+            peticion = json.loads(linea)
+            if not isinstance(peticion, dict):
+                raise ErrorPeticion("La petición debe ser un objeto JSON")
+            respuesta = {"ok": True, **(await self.atender_async(peticion, cola))}
+        except (ErrorPeticion, ValueError, TypeError) as e:
+            respuesta = {"ok": False, "error": str(e)}
+        return json.dumps(respuesta, ensure_ascii=False)
+
+    async def _http(self, primera, reader, writer):
+        # HTTP mínimo: POST con el JSON de la petición en el cuerpo, sin suscripciones
+        largo = 0
+        origen = None
+        while True:
+            cabecera = (await reader.readline()).decode('latin-1').strip()
+            if not cabecera:
+                break
+            nombre, _, valor = cabecera.partition(":")
+            nombre = nombre.strip().lower()
+            if nombre == "content-length":
+                try:
+                    largo = int(valor.strip() or 0)
+                except ValueError:
+                    largo = -1
+            elif nombre == "origin":
+                origen = valor.strip()
+        metodo = primera.split(" ", 1)[0]
+        estado = "200 OK"
+        cors = b""
+        if origen is not None and origen not in self.origenes:
+            # Una página de otro origen no puede ni ejecutar acciones ni leer respuestas
+            estado = "403 Forbidden"
+            cuerpo = json.dumps({"ok": False, "error": f"Origen no permitido: {origen}"}).encode()
+        else:
+            if origen is not None:
+                cors = (f"Access-Control-Allow-Origin: {origen}\r\nVary: Origin\r\n"
+                        "Access-Control-Allow-Headers: Content-Type\r\n"
+                        "Access-Control-Allow-Methods: POST, OPTIONS\r\n").encode('latin-1')
+            if metodo == "OPTIONS":
+                cuerpo = b""
+            elif largo < 0:
+                estado = "400 Bad Request"
+                cuerpo = json.dumps({"ok": False, "error": "Content-Length inválido"}).encode()
+            elif metodo != "POST":
+                cuerpo = json.dumps({"ok": False, "error": "Use POST con un cuerpo JSON"}).encode()
+            else:
+                cuerpo = (await self.responder((await reader.readexactly(largo)).decode('utf-8'))).encode('utf-8')
+        writer.write(f"HTTP/1.1 {estado}\r\nContent-Type: application/json; charset=utf-8\r\n".encode()
+                     + cors + b"Connection: close\r\n"
+                     + f"Content-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo)
+        await writer.drain()
+
+    async def conexion(self, reader, writer):
+        cola = asyncio.Queue()
+
+        async def enviar_avisos():
+            while True:
+                evento = await cola.get()
+                writer.write((json.dumps(evento, ensure_ascii=False) + "\n").encode('utf-8'))
+                await writer.drain()
+
+        avisos = None
+        try:
+            primera = (await reader.readline()).decode('utf-8', 'replace')
+            if primera.split(" ", 1)[0] in ("GET", "POST", "OPTIONS"):
+                await self._http(primera.strip(), reader, writer)
+                return
+            avisos = asyncio.ensure_future(enviar_avisos())
+            linea = primera
+            while linea:
+                if linea.strip():
+                    writer.write(((await self.responder(linea, cola)) + "\n").encode('utf-8'))
+                    await writer.drain()
+                linea = (await reader.readline()).decode('utf-8', 'replace')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if avisos is not None:
+                avisos.cancel()
+            for partida in self.partidas.values():
+                partida.suscriptores.discard(cola)
+            writer.close()
+
+
+async def servir(host="127.0.0.1", puerto=8765, unix=None, directorio_cartones=None, origenes=()):
+    servidor = ServidorBingo(directorio_cartones, origenes)
+    if unix:
+        srv = await asyncio.start_unix_server(servidor.conexion, path=unix)
+        print(f"Servidor Bingo_P escuchando en {unix}")
+    else:
+        srv = await asyncio.start_server(servidor.conexion, host, puerto)
+        print(f"Servidor Bingo_P escuchando en {host}:{puerto}")
+    async with srv:
+        await srv.serve_forever()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Servidor de partidas Bingo_P (JSON por líneas o HTTP POST)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="ruta de un socket Unix en lugar de TCP")
+    parser.add_argument("--cartones-dir", default=None,
+                        help="directorio desde el que se permite cargar cartones con 'archivo'")
+    parser.add_argument("--origen", action="append", default=[],
+                        help="origen web autorizado para peticiones HTTP (repetible), p. ej. http://localhost:8000")
+    args = parser.parse_args()
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.unix, args.cartones_dir, args.origen))
+    except KeyboardInterrupt:
+        print("Servidor detenido.")
+
+
+if __name__ == '__main__':
+    main()
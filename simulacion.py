@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Simulador Monte Carlo de partidas completas, sin consola. Sigue la misma
+# lógica de rondas que jugar(): orden aleatorio de idiomas, extracciones sobre
+# el vocabulario del idioma y fin de la partida al primer ganador. Sirve para
+# dimensionar premios y revisar si algún cartón gana más de lo esperado.
+#
+# Uso: python simulacion.py cartones.txt -n 10000 --semilla 1 --procesos 4
+
+import random
+from collections import Counter, defaultdict
+
+from Bingo_P import LANG_MAX_WORDS, RondaIndice, aplicar_extracciones
+
+
+class ResultadoSimulacion:
+    def __init__(self):
+        self.partidas = 0
+        self.sin_ganador = 0
+        # extracciones (dentro de la ronda ganadora) hasta el primer ganador
+        self.extracciones = Counter()
+        # nº de cartones empatados al ganar
+        self.empates = Counter()
+        # número de ronda (1..4) e idioma en que terminó la partida
+        self.rondas = Counter()
+        self.idiomas = Counter()
+        self.victorias = Counter()
+
+    def unir(self, otro):
+        self.partidas += otro.partidas
+        self.sin_ganador += otro.sin_ganador
+        for nombre in ('extracciones', 'empates', 'rondas', 'idiomas', 'victorias'):
+            getattr(self, nombre).update(getattr(otro, nombre))
+        return self
+
+    def percentil(self, p):
+        total = sum(self.extracciones.values())
+        if not total:
+            return None
+        limite = p * total
+        acumulado = 0
+        for valor in sorted(self.extracciones):
+            acumulado += self.extracciones[valor]
+            if acumulado >= limite:
+                return valor
+
+    def resumen(self):
+        lineas = [f"Partidas simuladas: {self.partidas}"]
+        ganadas = self.partidas - self.sin_ganador
+        lineas.append(f"Partidas sin ganador: {self.sin_ganador}")
+        if ganadas:
+            media = sum(v * n for v, n in self.extracciones.items()) / ganadas
+            lineas.append(f"Extracciones hasta el primer ganador: media {media:.2f}, "
+                          f"p50 {self.percentil(0.5)}, p99 {self.percentil(0.99)}, "
+                          f"mín {min(self.extracciones)}, máx {max(self.extracciones)}")
+            lineas.append("Ganadores empatados: " + ", ".join(
+                f"{k}: {n}" for k, n in sorted(self.empates.items())))
+            lineas.append("Ronda en que terminó: " + ", ".join(
+                f"{k}: {n}" for k, n in sorted(self.rondas.items())))
+            lineas.append("Idioma en que terminó: " + ", ".join(
+                f"{k}: {n}" for k, n in sorted(self.idiomas.items())))
+            lineas.append("Cartones con más victorias: " + ", ".join(
+                f"{k} ({n})" for k, n in self.victorias.most_common(5)))
+        return "\n".join(lineas)
+
+
+class Simulador:
+    # Prepara una sola vez los cartones e índices; cada partida solo reinicia
+    # las marcas de los cartones en lugar de crear objetos nuevos.
+    def __init__(self, cartones, extracciones_por_ronda=None):
+        lang_to_cartones = defaultdict(list)
+        for c in cartones:
+            lang_to_cartones[c.lang].append(c)
+        self.rondas = {lang: RondaIndice(lista) for lang, lista in lang_to_cartones.items()}
+        self.vocabularios = {lang: sorted(ronda.indice) for lang, ronda in self.rondas.items()}
+        self.extracciones_por_ronda = extracciones_por_ronda
+
+    def partida(self, rng):
+        # Devuelve (nº de ronda, idioma, extracciones, ganadores) o None
+        idiomas = list(LANG_MAX_WORDS.keys())
+        rng.shuffle(idiomas)
+        for n_ronda, idioma in enumerate(idiomas, 1):
+            ronda = self.rondas.get(idioma)
+            if ronda is None:
+                continue
+            extracciones = self.vocabularios[idioma][:]
+            rng.shuffle(extracciones)
+            if self.extracciones_por_ronda is not None:
+                del extracciones[self.extracciones_por_ronda:]
+            ronda.reiniciar()
+            n, ganadores = aplicar_extracciones(ronda, extracciones)
+            if ganadores:
+                return n_ronda, idioma, n, ganadores
+        return None
+
+    def simular(self, n_partidas, semilla=None):
+        rng = random.Random(semilla)
+        res = ResultadoSimulacion()
+        for _ in range(n_partidas):
+            res.partidas += 1
+            fin = self.partida(rng)
+            if fin is None:
+                res.sin_ganador += 1
+                continue
+            n_ronda, idioma, extracciones, ganadores = fin
+            res.extracciones[extracciones] += 1
+            res.empates[len(ganadores)] += 1
+            res.rondas[n_ronda] += 1
+            res.idiomas[idioma] += 1
+            res.victorias.update(c.id for c in ganadores)
+        return res
+
+
+def _simular_lote(args):
+    cartones, n_partidas, semilla, extracciones_por_ronda = args
+    return Simulador(cartones, extracciones_por_ronda).simular(n_partidas, semilla)
+
+
+def simular(cartones, n_partidas, semilla=None, procesos=1, extracciones_por_ronda=None):
+    # Con procesos > 1 reparte las partidas entre varios procesos; cada lote
+    # recibe una semilla derivada de la principal para que sea reproducible.
+    if procesos is None or procesos <= 1:
+        return Simulador(cartones, extracciones_por_ronda).simular(n_partidas, semilla)
+    from concurrent.futures import ProcessPoolExecutor
+    rng = random.Random(semilla)
+    tamaños = [n_partidas // procesos + (1 if i < n_partidas % procesos else 0) for i in range(procesos)]
+    lotes = [(cartones, n, rng.getrandbits(64), extracciones_por_ronda) for n in tamaños if n]
+    res = ResultadoSimulacion()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for parcial in pool.map(_simular_lote, lotes):
+            res.unir(parcial)
+    return res
+
+
+def main():
+    import argparse
+    from Bingo_P import iterar_cartones_desde_archivo, RegistroIds
+
+    parser = argparse.ArgumentParser(description="Simulación Monte Carlo de partidas de Bingo_P")
+    parser.add_argument("archivos", nargs="+", help="archivos .txt, .csv o .bngp de cartones")
+    parser.add_argument("-n", "--partidas", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--extracciones", type=int, default=None,
+                        help="máximo de palabras por ronda antes de pasar a la siguiente (END)")
+    args = parser.parse_args()
+
+    vistos = RegistroIds()
+    cartones = []
+    for path in args.archivos:
+        cartones.extend(iterar_cartones_desde_archivo(path, vistos))
+    if not cartones:
+        print("No hay cartones cargados.")
+        return
+    res = simular(cartones, args.partidas, args.semilla, args.procesos, args.extracciones)
+    print(res.resumen())
+
+
+if __name__ == '__main__':
+    main()